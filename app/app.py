@@ -1,24 +1,38 @@
 """Crypto Options Trading Dashboard - Main Application."""
-from dash import Dash, html, dcc, Input, Output, State, callback, ctx
+from dash import Dash, html, dcc, Input, Output, State, callback, ctx, no_update
 import dash_bootstrap_components as dbc
-import pandas as pd
-from io import StringIO
 
 from components.filters import create_filters
 from components.weekly_bucket_heatmap import (
     create_bucket_heatmap, 
     create_bucket_heatmap_layout,
     create_week_details_list,
-    create_day_details_list
+    create_day_details_list,
+    get_bucket_labels
 )
 from components.weekly_52week_grid import (
     create_52week_grid, 
     create_52week_grid_layout,
     create_52week_table
 )
-from data.data_loader import load_all_data, clear_cache
-from data.data_processor import calculate_weekly_stats, create_weekly_buckets, create_daily_buckets, add_market_sentiment
-from data.data_updater import update_btc_data, update_stock_data
+from data.cache import enable_copy_on_write
+from data.data_loader import load_all_data
+from data.data_processor import (
+    add_market_sentiment, add_daily_change,
+    build_bucket_index, bucket_counts_from_index, lookup_bucket_rows,
+    DEFAULT_BUCKET_BINS
+)
+from data.refresh_jobs import submit_refresh, get_job, invalidate_ticker
+from data.frame_store import (
+    store_frames, get_frames, get_bucket_index, memoize, data_version, find_frames
+)
+from data.weekly_store import update_weekly_stats
+
+# Polls (1s apart) a refresh job may stay invisible to this worker before the UI gives up on it
+MAX_UNKNOWN_JOB_POLLS = 30
+
+# Cached frames are handed out as shallow copies (a no-op from pandas 3.0)
+enable_copy_on_write()
 
 # Initialize the Dash app
 app = Dash(
@@ -47,12 +61,16 @@ app.layout = dbc.Container([
     # Update status alert
     dbc.Alert(id='update-status', is_open=False, duration=5000, className="mb-3"),
     
-    # Data stores
+    # Data stores (data-store holds a {ticker, version} handle; frames stay server-side)
     dcc.Store(id='data-store'),
-    dcc.Store(id='weekly-data-store'),
     dcc.Store(id='view-mode-store', data='heatmap'),
     dcc.Store(id='bucket-mode-store', data='weekly'),  # daily or weekly
     
+    # Background refresh: running job id, completion marker, and status poller
+    dcc.Store(id='refresh-job-store'),
+    dcc.Store(id='refresh-done-store'),
+    dcc.Interval(id='refresh-poll', interval=1000, disabled=True),
+    
     # Loading indicator
     dcc.Loading(
         id="loading",
@@ -83,69 +101,156 @@ app.layout = dbc.Container([
 ], fluid=True)
 
 
+def build_frames(ticker):
+    """Load, process and register frames for a ticker; return the data-store handle.
+
+    Weekly stats and bucket indexes are only built for a data version this
+    worker has not registered yet.
+    """
+    raw_df = load_all_data(ticker)
+    raw_df = add_market_sentiment(raw_df)
+    raw_df = add_daily_change(raw_df)
+    version = data_version(raw_df)
+    handle = find_frames(ticker, version)
+    if handle is not None:
+        return handle
+    weekly_df = update_weekly_stats(ticker, raw_df)
+    bucket_index = {
+        'daily': build_bucket_index(raw_df, 'daily_change'),
+        'weekly': build_bucket_index(weekly_df, 'weekly_change'),
+    }
+    return store_frames(ticker, raw_df, weekly_df, bucket_index, version=version)
+
+
+def resolve_frames(handle):
+    """Return (handle, raw_df, weekly_df), rebuilding if this worker does not hold the handle.
+
+    The returned handle is the one that actually holds the frames (a rebuilt
+    version when the original was created by another worker).
+    """
+    if not handle:
+        return None, None, None
+    frames = get_frames(handle)
+    if frames is None:
+        handle = build_frames(handle['ticker'])
+        frames = get_frames(handle)
+    return (handle, *frames)
+
+
+def status_color(status):
+    """Map an update result status to an alert color."""
+    if status == 'success':
+        return "success"
+    elif status in ('up_to_date', 'running', 'queued'):
+        return "info"
+    elif status == 'failed':
+        return "danger"
+    return "warning"
+
+
 # Callbacks
 @callback(
     Output('data-store', 'data'),
-    Output('weekly-data-store', 'data'),
     Output('update-status', 'children'),
     Output('update-status', 'color'),
     Output('update-status', 'is_open'),
     Input('ticker-dropdown', 'value'),
-    Input('refresh-button', 'n_clicks'),
+    Input('refresh-done-store', 'data'),
     prevent_initial_call=False
 )
-def load_data(ticker, n_clicks):
-    """Load and process data for selected ticker. Update BTC database if refresh clicked."""
+def load_data(ticker, refresh_done):
+    """Load and process data for selected ticker; reload when a background refresh finishes."""
     update_message = ""
     update_color = "info"
     show_alert = False
     
     try:
-        # If refresh button was clicked, update the database first
-        if ctx.triggered_id == 'refresh-button':
-            clear_cache()  # Clear cache to force reload
-            if ticker == 'BTC':
-                print("Updating BTC database...")
-                result = update_btc_data()
-            else:
-                print(f"Updating {ticker} database...")
-                result = update_stock_data(ticker)
-            
-            update_message = result['message']
-            if result['status'] == 'success':
-                update_color = "success"
-            elif result['status'] == 'up_to_date':
-                update_color = "info"
-            else:
-                update_color = "warning"
+        if ctx.triggered_id == 'refresh-done-store' and refresh_done:
+            update_message = refresh_done['message']
+            update_color = status_color(refresh_done['status'])
             show_alert = True
         
-        raw_df = load_all_data(ticker)
-        raw_df = add_market_sentiment(raw_df)
-        weekly_df = calculate_weekly_stats(raw_df)
+        handle = build_frames(ticker)
         
         return (
-            raw_df.to_json(date_format='iso'), 
-            weekly_df.to_json(date_format='iso'),
+            handle,
             update_message,
             update_color,
             show_alert
         )
     except Exception as e:
         print(f"Error loading data: {e}")
-        return None, None, f"Error: {str(e)}", "danger", True
+        return None, f"Error: {str(e)}", "danger", True
+
+
+@callback(
+    Output('refresh-job-store', 'data'),
+    Output('refresh-poll', 'disabled'),
+    Output('update-status', 'children', allow_duplicate=True),
+    Output('update-status', 'color', allow_duplicate=True),
+    Output('update-status', 'is_open', allow_duplicate=True),
+    Input('refresh-button', 'n_clicks'),
+    State('ticker-dropdown', 'value'),
+    State('refresh-poll', 'n_intervals'),
+    prevent_initial_call=True
+)
+def start_refresh(n_clicks, ticker, n_intervals):
+    """Queue a background refresh (deduplicated per ticker) and start polling it."""
+    try:
+        job_id = submit_refresh(ticker)
+    except RuntimeError as e:
+        # Claim contended by other workers; the running refresh will reload the data
+        print(f"Refresh for {ticker} not started: {e}")
+        return no_update, no_update, f"A refresh of {ticker} is already running", "info", True
+    print(f"Refresh job {job_id} for {ticker}")
+    job_ref = {'job_id': job_id, 'ticker': ticker, 'started_poll': n_intervals or 0}
+    return job_ref, False, f"Refreshing {ticker}...", "info", True
+
+
+@callback(
+    Output('refresh-done-store', 'data'),
+    Output('refresh-poll', 'disabled', allow_duplicate=True),
+    Output('update-status', 'children', allow_duplicate=True),
+    Output('update-status', 'color', allow_duplicate=True),
+    Output('update-status', 'is_open', allow_duplicate=True),
+    Input('refresh-poll', 'n_intervals'),
+    State('refresh-job-store', 'data'),
+    prevent_initial_call=True
+)
+def poll_refresh(n_intervals, job_ref):
+    """Report refresh progress; when the job ends, hand its result to load_data."""
+    if not job_ref:
+        return no_update, True, no_update, no_update, no_update
+    
+    job = get_job(job_ref['job_id'])
+    if job is None:
+        # Not visible to this worker (yet); keep polling, give up only after a while
+        if (n_intervals or 0) - job_ref.get('started_poll', 0) < MAX_UNKNOWN_JOB_POLLS:
+            return no_update, False, f"Refresh of {job_ref['ticker']} in progress elsewhere...", "info", True
+        done = {'job_id': job_ref['job_id'], 'status': 'failed',
+                'message': f"Lost track of the {job_ref['ticker']} refresh; showing the latest stored data"}
+        return done, True, no_update, no_update, no_update
+    
+    if job['status'] in ('queued', 'running'):
+        message = f"{job['message']} ({job['progress']}%)"
+        return no_update, False, message, "info", True
+    
+    # The job may have run in another worker; drop this worker's cached frames too
+    invalidate_ticker(job['ticker'])
+    status = job['result']['status'] if job['status'] == 'finished' else 'failed'
+    done = {'job_id': job['id'], 'status': status, 'message': job['message']}
+    return done, True, no_update, no_update, no_update
 
 
 @callback(
     Output('bucket-heatmap', 'figure'),
     Input('data-store', 'data'),
-    Input('weekly-data-store', 'data'),
     Input('year-dropdown', 'value'),
     Input('bucket-mode-store', 'data'),
     Input('ticker-dropdown', 'value'),
     prevent_initial_call=False
 )
-def update_bucket_heatmap(raw_data_json, weekly_data_json, years, bucket_mode, ticker):
+def update_bucket_heatmap(handle, years, bucket_mode, ticker):
     """Update the bucket heatmap based on selected years, mode (daily/weekly), and ticker."""
     # Handle multi-select years (convert to list if single value)
     if years is None:
@@ -153,28 +258,20 @@ def update_bucket_heatmap(raw_data_json, weekly_data_json, years, bucket_mode, t
     elif not isinstance(years, list):
         years = [years]
     
-    if bucket_mode == 'daily':
-        if raw_data_json is None:
-            return {}
-        raw_df = pd.read_json(StringIO(raw_data_json))
-        raw_df['date'] = pd.to_datetime(raw_df['date'])
-        raw_df['year'] = raw_df['date'].dt.year
-        if years:
-            filtered_df = raw_df[raw_df['year'].isin(years)]
-        else:
-            filtered_df = raw_df
-        pivot_df = create_daily_buckets(filtered_df)
-        return create_bucket_heatmap(pivot_df, title_prefix="Daily", ticker=ticker)
-    else:
-        if weekly_data_json is None:
-            return {}
-        weekly_df = pd.read_json(StringIO(weekly_data_json))
-        if years:
-            filtered_df = weekly_df[weekly_df['year'].isin(years)]
-        else:
-            filtered_df = weekly_df
-        pivot_df = create_weekly_buckets(filtered_df)
-        return create_bucket_heatmap(pivot_df, title_prefix="Weekly", ticker=ticker)
+    handle, raw_df, weekly_df = resolve_frames(handle)
+    if handle is None:
+        return {}
+    mode = 'daily' if bucket_mode == 'daily' else 'weekly'
+    
+    def build_figure():
+        # Counts come straight from the precomputed (year, bucket) index
+        pivot_df = bucket_counts_from_index(get_bucket_index(handle, mode), years)
+        return create_bucket_heatmap(pivot_df, title_prefix=mode.capitalize(), ticker=ticker,
+                                     bins=DEFAULT_BUCKET_BINS)
+    
+    # Same inputs on the same data version -> reuse the figure
+    memo_key = ('bucket_heatmap', ticker, tuple(sorted(years)), mode, tuple(DEFAULT_BUCKET_BINS))
+    return memoize(handle, memo_key, build_figure)
 
 
 @callback(
@@ -182,12 +279,11 @@ def update_bucket_heatmap(raw_data_json, weekly_data_json, years, bucket_mode, t
     Output('details-panel-title', 'children'),
     Input('bucket-heatmap', 'clickData'),
     State('data-store', 'data'),
-    State('weekly-data-store', 'data'),
     State('bucket-mode-store', 'data'),
     State('ticker-dropdown', 'value'),
     prevent_initial_call=True
 )
-def update_details_panel(click_data, raw_data_json, weekly_data_json, bucket_mode, ticker):
+def update_details_panel(click_data, handle, bucket_mode, ticker):
     """Show weeks or days in clicked bucket."""
     if click_data is None:
         title = "Day Details" if bucket_mode == 'daily' else "Week Details"
@@ -204,23 +300,14 @@ def update_details_panel(click_data, raw_data_json, weekly_data_json, bucket_mod
         except ValueError:
             year = None
         
-        bins = [-0.5, -0.2, -0.15, -0.1, -0.05, 0, 0.05, 0.1, 0.15, 0.2, 0.5]
+        bucket_code = get_bucket_labels(DEFAULT_BUCKET_BINS).index(bucket)
+        handle, raw_df, weekly_df = resolve_frames(handle)
         
         if bucket_mode == 'daily':
-            if raw_data_json is None:
+            if raw_df is None:
                 return html.P("No data available", className="text-muted"), "Day Details"
             
-            raw_df = pd.read_json(StringIO(raw_data_json))
-            raw_df['date'] = pd.to_datetime(raw_df['date'])
-            raw_df['year'] = raw_df['date'].dt.year
-            
-            # Calculate daily change
-            raw_df['daily_change'] = (raw_df['market_close_price'] - raw_df['market_open_price']) / raw_df['market_open_price']
-            raw_df['change_bucket'] = pd.cut(raw_df['daily_change'], bins=bins, include_lowest=True).astype(str)
-            
-            filtered = raw_df[raw_df['change_bucket'] == bucket]
-            if year:
-                filtered = filtered[filtered['year'] == year]
+            filtered = lookup_bucket_rows(raw_df, get_bucket_index(handle, 'daily'), bucket_code, year)
             
             if filtered.empty:
                 return html.P(f"No days found in bucket {bucket}", className="text-muted"), "Day Details"
@@ -230,18 +317,10 @@ def update_details_panel(click_data, raw_data_json, weekly_data_json, bucket_mod
                 create_day_details_list(filtered, ticker)
             ]), "Day Details"
         else:
-            if weekly_data_json is None:
+            if weekly_df is None:
                 return html.P("No data available", className="text-muted"), "Week Details"
             
-            weekly_df = pd.read_json(StringIO(weekly_data_json))
-            weekly_df['week_start'] = pd.to_datetime(weekly_df['week_start'])
-            weekly_df['week_end'] = pd.to_datetime(weekly_df['week_end'])
-            
-            weekly_df['change_bucket'] = pd.cut(weekly_df['weekly_change'], bins=bins, include_lowest=True).astype(str)
-            
-            filtered = weekly_df[weekly_df['change_bucket'] == bucket]
-            if year:
-                filtered = filtered[filtered['year'] == year]
+            filtered = lookup_bucket_rows(weekly_df, get_bucket_index(handle, 'weekly'), bucket_code, year)
             
             if filtered.empty:
                 return html.P(f"No weeks found in bucket {bucket}", className="text-muted"), "Week Details"
@@ -257,15 +336,16 @@ def update_details_panel(click_data, raw_data_json, weekly_data_json, bucket_mod
 
 @callback(
     Output('52week-grid-container', 'children'),
-    Input('weekly-data-store', 'data'),
+    Input('data-store', 'data'),
     Input('year-dropdown', 'value'),
     Input('view-mode-store', 'data'),
     Input('ticker-dropdown', 'value'),
     prevent_initial_call=False
 )
-def update_52week_grid(weekly_data_json, years, view_mode, ticker):
+def update_52week_grid(handle, years, view_mode, ticker):
     """Update the 52-week grid based on selected years, view mode, and ticker."""
-    if weekly_data_json is None:
+    _, _, weekly_df = resolve_frames(handle)
+    if weekly_df is None:
         return html.Div("Loading data...", className="text-muted")
     
     # Handle multi-select years - use first selected year for grid view
@@ -274,10 +354,6 @@ def update_52week_grid(weekly_data_json, years, view_mode, ticker):
     
     year = years[0] if isinstance(years, list) else years
     
-    weekly_df = pd.read_json(StringIO(weekly_data_json))
-    weekly_df['week_start'] = pd.to_datetime(weekly_df['week_start'])
-    weekly_df['week_end'] = pd.to_datetime(weekly_df['week_end'])
-    
     if view_mode == 'table':
         return create_52week_table(weekly_df, year, ticker)
     return create_52week_grid(weekly_df, year)
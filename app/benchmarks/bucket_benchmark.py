@@ -0,0 +1,137 @@
+"""Benchmark bucket-distribution aggregation across 1, 10 and 100 tickers of 15 years each.
+
+Run from the app directory:
+    python benchmarks/bucket_benchmark.py [--repeat N]
+
+Times create_weekly_buckets/create_daily_buckets against the previous
+pd.cut + row-wise apply implementation (copied verbatim below) so
+regressions show up as a ratio; both must return the same rows first.
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.bucketing import bucket_labels
+from data.data_processor import DEFAULT_BUCKET_BINS, create_weekly_buckets, create_daily_buckets
+
+TICKER_COUNTS = [1, 10, 100]
+YEARS = 15
+
+def make_daily_frame(n_tickers, years=YEARS, seed=0):
+    """Synthetic daily OHLC rows for n_tickers stacked into one frame."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2010-01-01', periods=years * 365, freq='D')
+    n = len(dates) * n_tickers
+    open_price = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    return pd.DataFrame({
+        'date': np.tile(dates, n_tickers),
+        'market_open_price': open_price,
+        'market_close_price': open_price * (1 + rng.normal(0, 0.03, n)),
+    })
+
+def make_weekly_frame(n_tickers, years=YEARS, seed=0):
+    """Synthetic weekly rows (year, weekly_change) for n_tickers stacked into one frame."""
+    rng = np.random.default_rng(seed)
+    year = np.repeat(np.arange(2010, 2010 + years), 52)
+    return pd.DataFrame({
+        'year': np.tile(year, n_tickers),
+        'weekly_change': rng.normal(0, 0.08, len(year) * n_tickers),
+    })
+
+# create_weekly_buckets / create_daily_buckets as they were before the vectorized
+# percentages, copied verbatim so the speedup is measured against the replaced code
+
+def legacy_weekly_buckets(df, bins=None):
+    """Create bucket distribution for weekly price changes."""
+    if bins is None:
+        bins = DEFAULT_BUCKET_BINS
+    
+    df = df.copy()
+    df['change_bucket'] = pd.cut(df['weekly_change'], bins=bins, include_lowest=True)
+    df['change_bucket'] = df['change_bucket'].astype(str)
+    
+    # Group by year only (removed market_sentiment)
+    pivot = df.groupby(['year', 'change_bucket']).size().reset_index(name='count')
+    yearly_totals = pivot.groupby('year')['count'].sum()
+    pivot['percentage'] = pivot.apply(
+        lambda x: (x['count'] / yearly_totals[x['year']]) * 100,
+        axis=1
+    )
+    
+    return pivot
+
+
+def legacy_daily_buckets(df, bins=None):
+    """Create bucket distribution for daily price changes."""
+    if bins is None:
+        bins = DEFAULT_BUCKET_BINS
+    
+    df = df.copy()
+    df['date'] = pd.to_datetime(df['date'])
+    df['year'] = df['date'].dt.year
+    
+    # Calculate daily change if not present
+    if 'daily_change' not in df.columns:
+        df['daily_change'] = (df['market_close_price'] - df['market_open_price']) / df['market_open_price']
+    
+    df['change_bucket'] = pd.cut(df['daily_change'], bins=bins, include_lowest=True)
+    df['change_bucket'] = df['change_bucket'].astype(str)
+    
+    # Group by year only
+    pivot = df.groupby(['year', 'change_bucket']).size().reset_index(name='count')
+    yearly_totals = pivot.groupby('year')['count'].sum()
+    pivot['percentage'] = pivot.apply(
+        lambda x: (x['count'] / yearly_totals[x['year']]) * 100,
+        axis=1
+    )
+    
+    return pivot
+
+def check_same_output(legacy, current, bins=DEFAULT_BUCKET_BINS):
+    """Fail unless both implementations return the same distribution rows (order aside).
+
+    The only known difference is the first label: include_lowest widened it
+    to '(-0.501, -0.2]', which BUCKET_ORDER never matched. The synthetic
+    frames have no changes outside the bins, whose 'nan' bucket the legacy
+    code handles differently across pandas versions.
+    """
+    first_label = pd.cut([bins[0]], bins=bins, include_lowest=True).astype(str)[0]
+    legacy = legacy.replace({'change_bucket': {first_label: bucket_labels(bins)[0]}})
+
+    def normalized(pivot):
+        pivot = pivot[['year', 'change_bucket', 'count', 'percentage']].astype({'change_bucket': str})
+        return pivot.sort_values(['year', 'change_bucket']).reset_index(drop=True)
+    pd.testing.assert_frame_equal(normalized(legacy), normalized(current), check_dtype=False)
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'view':<8}{'tickers':>8}{'rows':>10}{'legacy s':>11}{'current s':>11}{'speedup':>9}")
+    for n_tickers in TICKER_COUNTS:
+        cases = [
+            ('weekly', make_weekly_frame(n_tickers), legacy_weekly_buckets, create_weekly_buckets),
+            ('daily', make_daily_frame(n_tickers), legacy_daily_buckets, create_daily_buckets),
+        ]
+        for view, df, legacy_fn, current_fn in cases:
+            check_same_output(legacy_fn(df), current_fn(df))
+            legacy = best_of(lambda: legacy_fn(df), args.repeat)
+            current = best_of(lambda: current_fn(df), args.repeat)
+            print(f"{view:<8}{n_tickers:>8}{len(df):>10}{legacy:>11.4f}{current:>11.4f}{legacy / current:>8.1f}x")
+
+if __name__ == '__main__':
+    main()
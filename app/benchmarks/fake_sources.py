@@ -0,0 +1,173 @@
+"""Local fake CoinAPI / Yahoo / alternative.me server and SQLite database for offline refresh runs.
+
+FakeSources serves deterministic synthetic data over HTTP with a fixed
+per-request latency, so batch refreshes can be benchmarked and tested
+without network access or PostgreSQL:
+
+    with FakeSources(latency=0.2) as sources:
+        db_params = create_offline_db(path)
+        sources.install()  # Point the updater's URLs at the fake server
+        refresh_tickers(['BTC', 'TSLA'], fetch_fn=sources.fetch_stock, db_params=db_params)
+"""
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+import pandas as pd
+import requests
+from sqlalchemy import text
+from data.db import get_engine
+from data.rate_limit import wait_for_slot
+
+STOCK_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS stock_prices_daily (
+        ticker TEXT NOT NULL,
+        date DATE NOT NULL,
+        open_price REAL,
+        high_price REAL,
+        low_price REAL,
+        close_price REAL,
+        volume INTEGER,
+        updated_at TIMESTAMP,
+        PRIMARY KEY (ticker, date)
+    )
+"""
+
+BTC_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS bitcoin_prices_daily (
+        date TIMESTAMP PRIMARY KEY,
+        market_open_price REAL,
+        market_open_timestamp TIMESTAMP,
+        market_close_price REAL,
+        market_close_timestamp TIMESTAMP,
+        avg_price REAL,
+        daily_high REAL,
+        daily_low REAL,
+        daily_price_change REAL,
+        market_price_change REAL,
+        updated_at TIMESTAMP
+    )
+"""
+
+def _prices(seed, n):
+    rng = np.random.default_rng(seed)
+    return 100 * np.cumprod(1 + rng.normal(0, 0.01, n))
+
+def coinapi_bars(time_start, time_end):
+    """30-minute BTC bars in the CoinAPI exchangerate history layout."""
+    opens = pd.date_range(pd.Timestamp(time_start).floor('D'), pd.Timestamp(time_end).ceil('D'),
+                          freq='30min', inclusive='left', tz='UTC')
+    price = _prices(int(opens[0].timestamp()) if len(opens) else 0, len(opens))
+    fmt = '%Y-%m-%dT%H:%M:%S.0000000Z'
+    return [
+        {
+            'time_period_start': start.strftime(fmt),
+            'time_period_end': (start + pd.Timedelta(minutes=30)).strftime(fmt),
+            'time_open': start.strftime(fmt),
+            'time_close': (start + pd.Timedelta(minutes=30)).strftime(fmt),
+            'rate_open': p,
+            'rate_high': p * 1.002,
+            'rate_low': p * 0.998,
+            'rate_close': p * 1.001,
+        }
+        for start, p in zip(opens, price)
+    ]
+
+def yahoo_rows(ticker, start, end):
+    """Daily business-day rows shaped like yfinance history() after reset_index()."""
+    days = pd.bdate_range(start, end)
+    price = _prices(sum(map(ord, ticker)), len(days))
+    return [
+        {'Date': day.strftime('%Y-%m-%d'), 'Open': p, 'High': p * 1.01, 'Low': p * 0.99,
+         'Close': p * 1.005, 'Volume': 1_000_000}
+        for day, p in zip(days, price)
+    ]
+
+def fear_greed_rows(limit):
+    """Latest `limit` daily Fear & Greed records in the alternative.me (date_format=us) layout."""
+    days = pd.date_range(end=pd.Timestamp.today().normalize(), periods=limit)[::-1]
+    return [
+        {'value': str(20 + i % 60), 'value_classification': 'Neutral', 'timestamp': day.strftime('%m-%d-%Y')}
+        for i, day in enumerate(days)
+    ]
+
+class FakeSources:
+    """Threaded HTTP server answering CoinAPI, Yahoo-style and F&G requests after `latency` seconds."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.requests = {'coinapi': 0, 'yahoo': 0, 'fng': 0}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def _handler(self):
+        sources = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+                parts = parsed.path.strip('/').split('/')
+                time.sleep(sources.latency)
+                if parts[0] == 'coinapi':
+                    body = coinapi_bars(query['time_start'], query['time_end'])
+                elif parts[0] == 'yahoo':
+                    body = yahoo_rows(parts[1], query['start'], query['end'])
+                elif parts[0] == 'fng':
+                    body = {'data': fear_greed_rows(int(query.get('limit', 1)))}
+                else:
+                    self.send_error(404)
+                    return
+                with sources._lock:
+                    sources.requests[parts[0]] += 1
+                payload = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+    def install(self):
+        """Point data_updater / data_loader at this server (module-level URL settings)."""
+        from data import data_updater, data_loader
+        data_updater.COINAPI_BASE_URL = f"{self.url}/coinapi"
+        data_loader.FG_API_URL = f"{self.url}/fng/"
+
+    def fetch_stock(self, ticker, start_date, end_date):
+        """fetch_fn for update_stock_data: same rate limiter and frame layout as fetch_stock_data_yahoo."""
+        wait_for_slot('yahoo')
+        response = requests.get(f"{self.url}/yahoo/{ticker}", timeout=30,
+                                params={'start': str(start_date), 'end': str(end_date)})
+        df = pd.DataFrame(response.json())
+        if df.empty:
+            return df
+        df['Date'] = pd.to_datetime(df['Date'])
+        return df
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+def create_offline_db(path):
+    """Create a SQLite database with the daily price tables; returns its db_params."""
+    db_params = {'url': f"sqlite:///{path}"}
+    with get_engine(db_params).begin() as conn:
+        conn.execute(text(BTC_TABLE_DDL))
+        conn.execute(text(STOCK_TABLE_DDL))
+    return db_params
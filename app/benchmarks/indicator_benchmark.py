@@ -0,0 +1,83 @@
+"""Benchmark the rolling indicator engine on 5, 15 and 30 years of daily prices.
+
+Run from the app directory:
+    python benchmarks/indicator_benchmark.py [--repeat N]
+
+Times compute_indicators (one cumulative sum for all windows) against pandas
+rolling().mean() per window plus cummax, and get_indicators on a cold
+cache against get_indicators extending a cached history by one new day.
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.indicators import compute_indicators, get_indicators, clear_indicators, DEFAULT_MA_WINDOWS
+
+YEAR_COUNTS = [5, 15, 30]
+
+def make_price_frame(years, seed=0):
+    """Synthetic daily close prices following a random walk."""
+    rng = np.random.default_rng(seed)
+    n = years * 365
+    return pd.DataFrame({
+        'date': pd.date_range('1995-01-01', periods=n),
+        'daily_avg_price': 100 * np.cumprod(1 + rng.normal(0, 0.03, n)),
+    })
+
+def pandas_indicators(df, windows=DEFAULT_MA_WINDOWS, price_col='daily_avg_price'):
+    """Reference implementation: one pandas rolling mean per window."""
+    price = df[price_col]
+    out = pd.DataFrame({'date': df['date']})
+    for w in windows:
+        out[f'MA_{w}'] = price.rolling(window=w).mean()
+    for w in windows:
+        out[f'MA{w}_ratio'] = out[f'MA_{w}'] / price - 1
+    out['current_max_price'] = price.cummax()
+    out['price_ratio'] = price / out['current_max_price'] - 1
+    return out
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def cold_get(df):
+    """Time get_indicators with nothing cached for the ticker (hash + full build)."""
+    clear_indicators('BENCH')
+    start = time.perf_counter()
+    get_indicators('BENCH', df)
+    return time.perf_counter() - start
+
+def extend_by_one_day(df):
+    """Seed the cache with all but the last day, then time the incremental update."""
+    clear_indicators('BENCH')
+    get_indicators('BENCH', df.iloc[:-1])
+    start = time.perf_counter()
+    get_indicators('BENCH', df)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'years':>6}{'rows':>8}{'pandas s':>11}{'engine s':>11}{'cold s':>10}{'extend s':>11}{'speedup':>9}")
+    for years in YEAR_COUNTS:
+        df = make_price_frame(years)
+        reference = best_of(lambda: pandas_indicators(df), args.repeat)
+        engine = best_of(lambda: compute_indicators(df), args.repeat)
+        cold = min(cold_get(df) for _ in range(args.repeat))
+        extend = min(extend_by_one_day(df) for _ in range(args.repeat))
+        print(f"{years:>6}{len(df):>8}{reference:>11.4f}{engine:>11.4f}{cold:>10.4f}{extend:>11.4f}{reference / engine:>8.1f}x")
+    clear_indicators('BENCH')
+
+if __name__ == '__main__':
+    main()
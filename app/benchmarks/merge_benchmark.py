@@ -0,0 +1,77 @@
+"""Benchmark the price/Fear & Greed join across 1, 10 and 100 tickers of 15 years each.
+
+Run from the app directory:
+    python benchmarks/merge_benchmark.py [--repeat N]
+
+Times merge_fear_greed (sorted integer day keys, exact and as-of) against the
+previous .dt.date object merge so regressions show up as a ratio.
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_processor import merge_fear_greed
+
+TICKER_COUNTS = [1, 10, 100]
+YEARS = 15
+
+def make_price_frame(n_tickers, years=YEARS, seed=0):
+    """Synthetic weekday price rows for n_tickers stacked into one frame."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2010-01-01', periods=years * 261)
+    n = len(dates) * n_tickers
+    return pd.DataFrame({
+        'date': np.tile(dates, n_tickers),
+        'market_open_price': rng.random(n) * 100,
+        'market_close_price': rng.random(n) * 100,
+    })
+
+def make_fear_greed_frame(years=YEARS, seed=0):
+    """Synthetic daily Fear & Greed rows with a few missing days."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2010-01-01', periods=years * 365)
+    dates = dates[rng.random(len(dates)) > 0.02]
+    return pd.DataFrame({
+        'date': dates,
+        'value_classification': 'Neutral',
+        'value': rng.integers(0, 100, len(dates)),
+    })
+
+def legacy_merge(price_df, fg_df):
+    """Previous implementation: Python date objects on both sides, hash merge, then sort."""
+    price_df = price_df.copy()
+    fg_df = fg_df.copy()
+    price_df['date'] = pd.to_datetime(price_df['date']).dt.date
+    fg_df['date'] = pd.to_datetime(fg_df['date']).dt.date
+    merged = pd.merge(price_df, fg_df, on='date', how='inner')
+    return merged.sort_values('date')
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    fg_df = make_fear_greed_frame()
+    print(f"{'tickers':>8}{'rows':>10}{'legacy s':>11}{'exact s':>10}{'as-of s':>10}{'speedup':>9}")
+    for n_tickers in TICKER_COUNTS:
+        price_df = make_price_frame(n_tickers)
+        legacy = best_of(lambda: legacy_merge(price_df, fg_df), args.repeat)
+        exact = best_of(lambda: merge_fear_greed(price_df, fg_df), args.repeat)
+        asof = best_of(lambda: merge_fear_greed(price_df, fg_df, asof=True), args.repeat)
+        print(f"{n_tickers:>8}{len(price_df):>10}{legacy:>11.4f}{exact:>10.4f}{asof:>10.4f}{legacy / exact:>8.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Benchmark refresh_tickers throughput offline against the local fake upstream server.
+
+Run from the app directory:
+    python benchmarks/refresh_benchmark.py [--tickers N] [--latency S] [--days D]
+
+Each run starts from an empty SQLite database and refreshes BTC plus N
+synthetic stock tickers with 1, 2, 4 and 8 workers. Rate limits are raised
+for the run so the timings show pool concurrency against the fake
+server's per-request latency rather than the production request rates.
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_sources import FakeSources, create_offline_db
+from data import data_updater, disk_cache
+from data.db import dispose_engines
+from data.rate_limit import RATE_LIMITERS
+
+WORKER_COUNTS = [1, 2, 4, 8]
+
+def run(sources, tickers, workers, days, workdir):
+    """Refresh all tickers into a fresh database; returns refresh_tickers' report."""
+    db_params = create_offline_db(os.path.join(workdir, f"refresh_{workers}.db"))
+    history_start = date.today() - timedelta(days=days)
+    # New databases are backfilled from these dates instead of 2020-01-01
+    data_updater.BTC_HISTORY_START = history_start
+    data_updater.STOCK_HISTORY_START = history_start
+    return data_updater.refresh_tickers(tickers, max_workers=workers,
+                                        fetch_fn=sources.fetch_stock, db_params=db_params)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tickers', type=int, default=12)
+    parser.add_argument('--latency', type=float, default=0.25)
+    parser.add_argument('--days', type=int, default=60)
+    args = parser.parse_args()
+
+    for bucket in RATE_LIMITERS.values():
+        bucket.rate, bucket.capacity = 1000.0, 1000
+    tickers = ['BTC'] + [f"T{i:03d}" for i in range(args.tickers)]
+
+    with tempfile.TemporaryDirectory() as workdir, FakeSources(latency=args.latency) as sources:
+        disk_cache.CACHE_DIR = workdir
+        sources.install()
+        print(f"{'workers':>8}{'tickers':>9}{'ok':>5}{'failed':>8}{'wall s':>9}{'tickers/s':>11}")
+        for workers in WORKER_COUNTS:
+            report = run(sources, tickers, workers, args.days, workdir)
+            print(f"{workers:>8}{len(tickers):>9}{report['succeeded']:>5}{report['failed']:>8}"
+                  f"{report['elapsed']:>9.2f}{len(tickers) / report['elapsed']:>11.1f}")
+            dispose_engines()
+
+if __name__ == '__main__':
+    main()
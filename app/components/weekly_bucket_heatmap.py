@@ -2,11 +2,14 @@
 import plotly.graph_objects as go
 from dash import html, dcc, dash_table
 import dash_bootstrap_components as dbc
+import numpy as np
 import pandas as pd
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from data.market_sentiment import get_fg_emoji
+from data.data_processor import DEFAULT_BUCKET_BINS
+from data.bucketing import bucket_labels
 
 # Crypto-related tickers that should show Fear & Greed data
 CRYPTO_TICKERS = ['BTC', 'MSTR', 'HOOD']
@@ -24,8 +27,21 @@ BUCKET_ORDER = [
     '(0.2, 0.5]'
 ]
 
-def create_bucket_heatmap(pivot_df, title_prefix="Weekly", ticker=""):
+def get_bucket_labels(bins=None):
+    """Return display labels indexed by bucket code (BUCKET_ORDER for the default bins)."""
+    if bins is None or list(bins) == DEFAULT_BUCKET_BINS:
+        return BUCKET_ORDER
+    return bucket_labels(bins)
+
+def create_bucket_heatmap(pivot_df, title_prefix="Weekly", ticker="", bins=None):
     """Create the bucket distribution heatmap with ticker in title."""
+    labels = get_bucket_labels(bins)
+    if 'bucket_code' in pivot_df.columns:
+        # Integer bucket codes get their labels only here, at render time
+        pivot_df = pivot_df.assign(
+            change_bucket=np.asarray(labels, dtype=object)[pivot_df['bucket_code'].to_numpy()]
+        )
+    
     count_pivot = pd.pivot_table(
         pivot_df,
         values='count',
@@ -43,7 +59,7 @@ def create_bucket_heatmap(pivot_df, title_prefix="Weekly", ticker=""):
     )
     
     # Filter and reorder columns
-    available_buckets = [b for b in BUCKET_ORDER if b in count_pivot.columns]
+    available_buckets = [b for b in labels if b in count_pivot.columns]
     if not available_buckets:
         available_buckets = list(count_pivot.columns)
     count_pivot = count_pivot[available_buckets]
@@ -1,18 +1,76 @@
 """Data loading and processing modules."""
+from .cache import FrameCache
+from .db import (
+    get_engine,
+    configure_engine,
+    dispose_engines,
+    get_pool_stats
+)
 from .data_loader import (
     load_btc_daily_data,
     load_fear_greed_data,
+    fetch_fear_greed,
+    update_fear_greed_history,
     load_stock_daily_data,
     load_all_data,
+    load_many,
+    load_table_incremental,
+    load_table_range,
+    years_to_range,
+    load_rollup,
     get_db_params,
-    clear_cache
+    clear_cache,
+    get_cache_stats
 )
 from .data_processor import (
     calculate_weekly_stats,
+    calculate_monthly_stats,
     merge_fear_greed,
     add_market_sentiment,
     create_weekly_buckets,
-    create_daily_buckets
+    create_daily_buckets,
+    bucket_change_distribution,
+    add_daily_change,
+    build_bucket_index,
+    lookup_bucket_rows,
+    bucket_counts_from_index
+)
+from .disk_cache import (
+    read_cached,
+    write_cached,
+    clear_disk_cache
+)
+from .frame_store import (
+    store_frames,
+    get_frames,
+    find_frames,
+    data_version,
+    clear_frames,
+    compute_data_version,
+    memoize,
+    get_bucket_index,
+    get_memory_report
+)
+from .schema import (
+    apply_schema,
+    frame_memory_report,
+    FG_CLASSIFICATION_DTYPE
+)
+from .weekly_store import (
+    update_weekly_stats,
+    splice_weekly_stats,
+    weekly_stats_consistent
+)
+from .indicators import (
+    compute_indicators,
+    get_indicators,
+    clear_indicators,
+    rolling_mean,
+    DEFAULT_MA_WINDOWS
+)
+from .rollups import (
+    refresh_rollups,
+    ROLLUP_TABLES
 )
 from .market_sentiment import (
     MARKET_SENTIMENT,
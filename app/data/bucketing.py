@@ -0,0 +1,83 @@
+"""Vectorized price-change bucketing: integer bucket codes, per-year counts and row indexes."""
+import numpy as np
+import pandas as pd
+
+def assign_bucket_codes(values, bins):
+    """Return the bucket code of each value for right-closed bins (first bin includes its left edge).
+
+    Code i means bins[i] < value <= bins[i + 1]; NaN and out-of-range values get -1.
+    """
+    values = np.asarray(values, dtype=float)
+    edges = np.asarray(bins, dtype=float)
+    codes = np.searchsorted(edges, values, side='left') - 1
+    codes[values == edges[0]] = 0
+    codes[np.isnan(values) | (values < edges[0]) | (values > edges[-1])] = -1
+    return codes
+
+def bucket_labels(bins):
+    """Return interval labels like '(-0.05, 0.0]' indexed by bucket code."""
+    return [f"({float(lo)}, {float(hi)}]" for lo, hi in zip(bins[:-1], bins[1:])]
+
+def count_by_year(years, values, bins):
+    """Count values per (year, bucket) with one bincount.
+
+    Totals count every row of a year, including rows outside the bins, so
+    percentages are shares of all the year's rows.
+    """
+    n_buckets = len(bins) - 1
+    codes = assign_bucket_codes(values, bins)
+    year_values, year_codes = np.unique(np.asarray(years), return_inverse=True)
+    n_years = len(year_values)
+
+    valid = np.flatnonzero(codes >= 0)
+    cell_keys = year_codes[valid] * n_buckets + codes[valid]
+    counts = np.bincount(cell_keys, minlength=n_years * n_buckets).reshape(n_years, n_buckets)
+    totals = np.bincount(year_codes, minlength=n_years)
+
+    return {
+        'bins': list(bins),
+        'years': year_values,
+        'counts': counts,
+        'totals': totals,
+        '_cells': (valid, cell_keys),
+    }
+
+def build_bucket_index(years, values, bins):
+    """Bucket values in one pass; return per-year counts and (year, code) -> row positions."""
+    index = count_by_year(years, values, bins)
+    valid, cell_keys = index.pop('_cells')
+    n_buckets = len(bins) - 1
+
+    # Row positions per cell: one stable sort, split at cell boundaries
+    order = np.argsort(cell_keys, kind='stable')
+    cells, starts = np.unique(cell_keys[order], return_index=True)
+    groups = np.split(valid[order], starts[1:]) if len(cells) else []
+    index['positions'] = {
+        (index['years'][cell // n_buckets].item(), int(cell % n_buckets)): rows
+        for cell, rows in zip(cells, groups)
+    }
+    return index
+
+def distribution_frame(bucket_index, years=None):
+    """Return (year, bucket_code, count, percentage) rows for non-empty cells, optionally filtered by year."""
+    year_values = bucket_index['years']
+    counts = bucket_index['counts']
+    totals = bucket_index['totals']
+    keep = np.isin(year_values, years) if years else np.ones(len(year_values), dtype=bool)
+
+    year_idx, bucket_codes = np.nonzero(counts * keep[:, None])
+    cell_counts = counts[year_idx, bucket_codes]
+    return pd.DataFrame({
+        'year': year_values[year_idx],
+        'bucket_code': bucket_codes,
+        'count': cell_counts,
+        'percentage': cell_counts / totals[year_idx] * 100,
+    })
+
+def lookup_positions(bucket_index, bucket_code, year=None):
+    """Return sorted row positions in one bucket (all years when year is None)."""
+    positions = bucket_index['positions']
+    if year is not None:
+        return positions.get((year, bucket_code), np.array([], dtype=np.intp))
+    parts = [rows for (_, code), rows in positions.items() if code == bucket_code]
+    return np.sort(np.concatenate(parts)) if parts else np.array([], dtype=np.intp)
@@ -0,0 +1,121 @@
+"""Bounded in-memory frame cache with per-namespace TTLs, size-aware LRU eviction and stats."""
+import threading
+import time
+from collections import OrderedDict
+import pandas as pd
+
+PANDAS_MAJOR = int(pd.__version__.split('.')[0])
+
+def copy_on_write_enabled():
+    """True when pandas copy-on-write is active (always from pandas 3.0; opt-in before)."""
+    return PANDAS_MAJOR >= 3 or pd.get_option('mode.copy_on_write') is True
+
+def enable_copy_on_write():
+    """Turn on copy-on-write for the process on pandas 2.x so cache hits can be shallow copies.
+
+    Call once at application start-up; it changes pandas semantics process-wide.
+    """
+    if PANDAS_MAJOR < 3:
+        pd.set_option('mode.copy_on_write', True)
+
+# Seconds before an entry expires, per namespace (None = never)
+DEFAULT_TTLS = {
+    'fear_greed': 6 * 3600,
+    'btc': 3600,
+    'stock': 3600,
+    'rollup': 3600,
+}
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+def frame_nbytes(df):
+    """Approximate memory footprint of a frame in bytes."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+class FrameCache:
+    """LRU cache of DataFrames keyed by (namespace, key).
+
+    With pandas copy-on-write enabled frames are returned as shallow copies
+    that callers can modify without touching the cached data; otherwise they
+    get deep copies.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, ttls=None):
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _count(self, namespace, counter, amount=1):
+        stats = self._stats.setdefault(namespace, {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0})
+        stats[counter] += amount
+
+    def _remove(self, cache_key):
+        entry = self._entries.pop(cache_key)
+        self._bytes -= entry['nbytes']
+
+    def get(self, namespace, key):
+        """Return the cached frame or None on a miss or expired entry."""
+        cache_key = (namespace, key)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                self._count(namespace, 'misses')
+                return None
+            if entry['expires_at'] is not None and time.monotonic() >= entry['expires_at']:
+                self._remove(cache_key)
+                self._count(namespace, 'expirations')
+                self._count(namespace, 'misses')
+                return None
+            self._entries.move_to_end(cache_key)
+            self._count(namespace, 'hits')
+            return entry['df'].copy(deep=not copy_on_write_enabled())
+
+    def set(self, namespace, key, df):
+        """Store a frame, evicting least recently used entries to stay under max_bytes."""
+        cache_key = (namespace, key)
+        nbytes = frame_nbytes(df)
+        ttl = self.ttls.get(namespace)
+        with self._lock:
+            if cache_key in self._entries:
+                self._remove(cache_key)
+            if nbytes > self.max_bytes:
+                return
+            while self._entries and self._bytes + nbytes > self.max_bytes:
+                evicted_key = next(iter(self._entries))
+                self._remove(evicted_key)
+                self._count(evicted_key[0], 'evictions')
+            self._entries[cache_key] = {
+                'df': df.copy(deep=not copy_on_write_enabled()),
+                'nbytes': nbytes,
+                'expires_at': time.monotonic() + ttl if ttl is not None else None,
+            }
+            self._bytes += nbytes
+
+    def invalidate(self, namespace=None, key=None):
+        """Drop entries for one (namespace, key), a whole namespace, or everything.
+
+        A key also matches tuple keys that start with it, e.g. 'BTC' drops
+        ('BTC', start, end, columns) range entries.
+        """
+        with self._lock:
+            for cache_key in list(self._entries):
+                if namespace is not None and cache_key[0] != namespace:
+                    continue
+                entry_key = cache_key[1]
+                if key is not None and entry_key != key and not (
+                        isinstance(entry_key, tuple) and entry_key and entry_key[0] == key):
+                    continue
+                self._remove(cache_key)
+
+    def stats(self):
+        """Return hit/miss/eviction/expiration counters per namespace plus current size."""
+        with self._lock:
+            return {
+                'namespaces': {ns: dict(counters) for ns, counters in self._stats.items()},
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
@@ -1,10 +1,26 @@
 """Data loading functions for PostgreSQL and APIs."""
+import os
+import re
+import numpy as np
 import pandas as pd
 import requests
-from sqlalchemy import create_engine
+from datetime import date
+from sqlalchemy import text, bindparam
+from data.db import get_engine
+from data.cache import FrameCache
+from data.disk_cache import read_cached, write_cached, merge_cached, get_watermark
+from data.rollups import ROLLUP_TABLES
+from data.schema import apply_schema
+from data.data_processor import merge_fear_greed
 
-# Simple in-memory cache
-_cache = {}
+# Bounded in-memory cache, namespaced by dataset ('btc', 'stock', 'fear_greed', 'rollup')
+_cache = FrameCache()
+
+# Overridable so refreshes can run against a local fake server
+FG_API_URL = os.environ.get('FG_API_URL', 'https://api.alternative.me/fng/')
+
+# First day of the alternative.me index; a store reaching it holds the full history
+FG_HISTORY_START = date(2018, 2, 1)
 
 def get_db_params():
     """Return database connection parameters."""
@@ -16,89 +32,342 @@ def get_db_params():
         'password': 'Love520!'
     }
 
-def load_btc_daily_data(db_params=None):
-    """Load BTC daily price data from PostgreSQL."""
+def load_table_incremental(table_name, dataset, key=None, filters=None, db_params=None):
+    """Load a daily table through the local disk cache, querying only rows from its watermark on.
+
+    Falls back to the cached copy when the database is unreachable.
+    """
     if db_params is None:
         db_params = get_db_params()
     
+    params = dict(filters or {})
+    conditions = [f"{col} = :{col}" for col in params]
+    cached = read_cached(dataset, key)
+    watermark = get_watermark(cached)
+    if watermark is not None:
+        # Re-read the watermark day too: the latest row may have been updated in place
+        conditions.append("date >= :since")
+        params['since'] = watermark
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = text(f"SELECT * FROM {table_name}{where} ORDER BY date")
+    
     try:
-        conn_string = f"postgresql://{db_params['user']}:{db_params['password']}@{db_params['host']}:{db_params['port']}/{db_params['database']}"
-        engine = create_engine(conn_string)
-        query = "SELECT * FROM bitcoin_prices_daily ORDER BY date"
-        df = pd.read_sql(query, engine)
-        df['date'] = pd.to_datetime(df['date'])
+        delta = pd.read_sql(query, get_engine(db_params), params=params)
+    except Exception as e:
+        if cached is None:
+            raise
+        print(f"Database unavailable, using local cache for {dataset} {key or ''}: {str(e)}")
+        return cached
+    
+    if delta.empty:
+        return cached if cached is not None else delta
+    
+    delta['date'] = pd.to_datetime(delta['date'])
+    df = merge_cached(cached, delta)
+    write_cached(dataset, df, key)
+    return df
+
+# Price columns the dashboard reads, per daily table (projection for ranged loads)
+BTC_PRICE_COLUMNS = ['date', 'market_open_price', 'market_close_price', 'daily_high', 'daily_low']
+STOCK_PRICE_COLUMNS = ['date', 'open_price', 'close_price', 'high_price', 'low_price']
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+def normalize_range(start=None, end=None, columns=None):
+    """Canonical (start, end, columns) used in SQL params and cache keys."""
+    start = pd.Timestamp(start).date() if start is not None else None
+    end = pd.Timestamp(end).date() if end is not None else None
+    columns = tuple(dict.fromkeys(['date', *columns])) if columns else None
+    return start, end, columns
+
+def years_to_range(years):
+    """Map a year selection (list or single year) to an inclusive (start, end) date range."""
+    if not years:
+        return None, None
+    years = years if isinstance(years, (list, tuple, set)) else [years]
+    return date(min(years), 1, 1), date(max(years), 12, 31)
+
+def build_range_query(table_name, start=None, end=None, columns=None, filters=None, order_by=('date',)):
+    """Build a parameterized SELECT with column projection and date-range pushdown.
+    
+    List/tuple filter values become an expanding IN (...) bind.
+    """
+    for name in [table_name, *(columns or []), *(filters or {}), *order_by]:
+        if not _IDENTIFIER.match(name):
+            raise ValueError(f"Invalid SQL identifier: {name!r}")
+    
+    params = {}
+    conditions = []
+    expanding = []
+    for col, value in (filters or {}).items():
+        if isinstance(value, (list, tuple)):
+            conditions.append(f"{col} IN :{col}")
+            params[col] = list(value)
+            expanding.append(bindparam(col, expanding=True))
+        else:
+            conditions.append(f"{col} = :{col}")
+            params[col] = value
+    if start is not None:
+        conditions.append("date >= :start")
+        params['start'] = start
+    if end is not None:
+        conditions.append("date <= :end")
+        params['end'] = end
+    select = ', '.join(columns) if columns else '*'
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = text(f"SELECT {select} FROM {table_name}{where} ORDER BY {', '.join(order_by)}")
+    return query.bindparams(*expanding), params
+
+def load_table_range(table_name, dataset, key=None, start=None, end=None, columns=None,
+                     filters=None, db_params=None):
+    """Load only the rows in [start, end] and the projected columns of a daily table.
+
+    Falls back to slicing the local disk cache when the database is unreachable.
+    """
+    if db_params is None:
+        db_params = get_db_params()
+    
+    start, end, columns = normalize_range(start, end, columns)
+    query, params = build_range_query(table_name, start, end, columns, filters)
+    try:
+        df = pd.read_sql(query, get_engine(db_params), params=params)
+    except Exception as e:
+        cached = read_cached(dataset, key)
+        if cached is None:
+            raise
+        print(f"Database unavailable, slicing local cache for {dataset} {key or ''}: {str(e)}")
+        mask = pd.Series(True, index=cached.index)
+        if start is not None:
+            mask &= cached['date'] >= pd.Timestamp(start)
+        if end is not None:
+            mask &= cached['date'] <= pd.Timestamp(end)
+        df = cached.loc[mask, list(columns) if columns else cached.columns].reset_index(drop=True)
+    
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+def load_btc_daily_data(db_params=None, start=None, end=None, columns=None):
+    """Load BTC daily price data from PostgreSQL, optionally limited to a date range and columns."""
+    ranged = start is not None or end is not None or columns is not None
+    cache_key = ('BTC', *normalize_range(start, end, columns)) if ranged else 'BTC'
+    cached = _cache.get('btc', cache_key)
+    if cached is not None:
+        print(f"Using cached BTC data")
+        return cached
+    
+    try:
+        if ranged:
+            df = load_table_range('bitcoin_prices_daily', 'btc_daily', start=start, end=end,
+                                  columns=columns, db_params=db_params)
+        else:
+            df = load_table_incremental('bitcoin_prices_daily', 'btc_daily', db_params=db_params)
         print(f"Loaded {len(df)} BTC daily records")
+        _cache.set('btc', cache_key, df)
         return df
     except Exception as e:
         print(f"Error loading BTC data: {str(e)}")
         raise
 
-def load_fear_greed_data(limit=2200):
-    """Fetch Fear & Greed Index data from API with caching."""
-    cache_key = f"fg_{limit}"
-    if cache_key in _cache:
-        print(f"Using cached Fear & Greed data")
-        return _cache[cache_key].copy()
+def fetch_fear_greed(limit):
+    """Fetch the most recent `limit` Fear & Greed records from the API."""
+    url = f"{FG_API_URL}?limit={limit}&format=json&date_format=us"
+    response = requests.get(url, timeout=30)
+    data = response.json()["data"]
+    df = pd.DataFrame(data)
+    df['date'] = pd.to_datetime(df['timestamp'])
+    df['value'] = df['value'].astype(int)
+    return df[['date', 'value_classification', 'value']]
+
+def update_fear_greed_history(initial_limit=2200, since=None):
+    """Bring the local Fear & Greed history up to date, pulling only the missing tail.
+
+    An empty store is seeded with `initial_limit` records (or enough to reach
+    `since`); afterwards only the days since the watermark (plus the watermark
+    day itself) are requested and merged idempotently. A store holding fewer
+    than `initial_limit` records, or starting after `since`, is backfilled
+    first. Falls back to the stored history when the API is unreachable.
+    """
+    history = read_cached('fear_greed')
+    watermark = get_watermark(history)
+    needed = initial_limit
+    if since is not None:
+        since = max(pd.Timestamp(since).date(), FG_HISTORY_START)
+        needed = max(needed, (date.today() - since).days + 1)
     
-    url = f"https://api.alternative.me/fng/?limit={limit}&format=json&date_format=us"
+    if history is None or history.empty:
+        limit = needed
+    else:
+        stored_start = pd.Timestamp(history['date'].min()).date()
+        complete = stored_start <= FG_HISTORY_START
+        short = len(history) < initial_limit or (since is not None and stored_start > since)
+        if short and not complete:
+            limit = needed
+        elif watermark >= date.today():
+            return history
+        else:
+            limit = (date.today() - watermark).days + 1
     try:
-        response = requests.get(url, timeout=30)
-        data = response.json()["data"]
-        df = pd.DataFrame(data)
-        df['date'] = pd.to_datetime(df['timestamp']).dt.date
-        df['value'] = df['value'].astype(int)
-        df = df[['date', 'value_classification', 'value']]
-        print(f"Loaded {len(df)} Fear & Greed records")
-        _cache[cache_key] = df.copy()
-        return df
+        tail = fetch_fear_greed(limit)
+        print(f"Fetched {len(tail)} Fear & Greed records (since {watermark or 'start'})")
     except Exception as e:
-        print(f"Error loading Fear & Greed data: {str(e)}")
-        raise
+        if history is None:
+            print(f"Error loading Fear & Greed data: {str(e)}")
+            raise
+        print(f"Fear & Greed API unavailable, using local history: {str(e)}")
+        return history
+    
+    history = merge_cached(history, tail)
+    write_cached('fear_greed', history)
+    return history
 
-def load_stock_daily_data(ticker, db_params=None):
-    """Load stock daily price data from PostgreSQL."""
-    if db_params is None:
-        db_params = get_db_params()
+def load_fear_greed_data(limit=2200, since=None):
+    """Return Fear & Greed data (last `limit` records, or all records from `since`) with caching."""
+    cached = _cache.get('fear_greed', (limit, since))
+    if cached is not None:
+        print(f"Using cached Fear & Greed data")
+        return cached
     
-    cache_key = f"stock_db_{ticker}"
-    if cache_key in _cache:
+    history = update_fear_greed_history(initial_limit=limit, since=since)
+    if since is not None:
+        df = history[history['date'] >= pd.Timestamp(since)]
+    else:
+        df = history.tail(limit)
+    df = apply_schema(df)
+    print(f"Loaded {len(df)} Fear & Greed records")
+    _cache.set('fear_greed', (limit, since), df)
+    return df
+
+def _stock_cache_key(ticker, start=None, end=None, columns=None):
+    """Cache key shared by load_stock_daily_data and load_many."""
+    ranged = start is not None or end is not None or columns is not None
+    return (ticker, *normalize_range(start, end, columns)) if ranged else ticker
+
+def load_stock_daily_data(ticker, db_params=None, start=None, end=None, columns=None):
+    """Load stock daily price data from PostgreSQL, optionally limited to a date range and columns."""
+    ranged = start is not None or end is not None or columns is not None
+    cache_key = _stock_cache_key(ticker, start, end, columns)
+    cached = _cache.get('stock', cache_key)
+    if cached is not None:
         print(f"Using cached {ticker} data from DB")
-        return _cache[cache_key].copy()
+        return cached
     
     try:
-        conn_string = f"postgresql://{db_params['user']}:{db_params['password']}@{db_params['host']}:{db_params['port']}/{db_params['database']}"
-        engine = create_engine(conn_string)
-        query = f"SELECT * FROM stock_prices_daily WHERE ticker = '{ticker}' ORDER BY date"
-        df = pd.read_sql(query, engine)
+        if ranged:
+            df = load_table_range('stock_prices_daily', 'stock_daily', key=ticker, start=start, end=end,
+                                  columns=columns, filters={'ticker': ticker}, db_params=db_params)
+        else:
+            df = load_table_incremental('stock_prices_daily', 'stock_daily', key=ticker,
+                                        filters={'ticker': ticker}, db_params=db_params)
         
         if df.empty:
             print(f"No data found for {ticker} in PostgreSQL")
             return pd.DataFrame()
         
-        df['date'] = pd.to_datetime(df['date'])
         print(f"Loaded {len(df)} {ticker} daily records from PostgreSQL")
-        _cache[cache_key] = df.copy()
+        _cache.set('stock', cache_key, df)
         return df
     except Exception as e:
         print(f"Error loading {ticker} data from PostgreSQL: {str(e)}")
         raise
 
-def load_all_data(ticker="BTC"):
-    """Load and merge all required data for a ticker."""
-    fg_df = load_fear_greed_data()
+def load_many(tickers, start=None, end=None, columns=None, db_params=None):
+    """Load daily prices for several tickers with one query; return {ticker: frame}.
+    
+    Tickers already in the cache are served from it; the rest are fetched with
+    a single `ticker IN (...)` query ordered by ticker and date, split into
+    contiguous per-ticker slices and cached under the same keys as
+    load_stock_daily_data. BTC comes from its own table via load_btc_daily_data.
+    Tickers without rows map to an empty frame.
+    """
+    if db_params is None:
+        db_params = get_db_params()
+    
+    frames = {}
+    missing = []
+    for ticker in dict.fromkeys(tickers):
+        if ticker == 'BTC':
+            frames[ticker] = load_btc_daily_data(db_params, start, end, columns)
+            continue
+        cached = _cache.get('stock', _stock_cache_key(ticker, start, end, columns))
+        if cached is not None:
+            frames[ticker] = cached
+        else:
+            missing.append(ticker)
+    
+    if missing:
+        range_start, range_end, projection = normalize_range(start, end, columns)
+        select = tuple(dict.fromkeys(['ticker', *projection])) if projection else None
+        query, params = build_range_query('stock_prices_daily', range_start, range_end, select,
+                                          filters={'ticker': missing}, order_by=('ticker', 'date'))
+        try:
+            df = pd.read_sql(query, get_engine(db_params), params=params)
+        except Exception as e:
+            print(f"Batch load failed, loading {len(missing)} tickers one by one: {str(e)}")
+            for ticker in missing:
+                frames[ticker] = load_stock_daily_data(ticker, db_params, start, end, columns)
+            return {ticker: frames[ticker] for ticker in dict.fromkeys(tickers)}
+        
+        df['date'] = pd.to_datetime(df['date'])
+        if projection and 'ticker' not in projection:
+            tickers_col = df.pop('ticker')
+        else:
+            tickers_col = df['ticker']
+        # Rows arrive grouped by ticker, so each ticker is one contiguous slice
+        boundaries = np.flatnonzero(tickers_col.to_numpy()[1:] != tickers_col.to_numpy()[:-1]) + 1
+        starts = np.r_[0, boundaries] if len(df) else np.array([], dtype=int)
+        stops = np.r_[boundaries, len(df)] if len(df) else np.array([], dtype=int)
+        for begin, stop in zip(starts, stops):
+            ticker = tickers_col.iat[begin]
+            part = df.iloc[begin:stop].reset_index(drop=True)
+            _cache.set('stock', _stock_cache_key(ticker, start, end, columns), part)
+            frames[ticker] = part
+        print(f"Loaded {len(df)} daily records for {len(starts)} tickers in one query")
+        for ticker in missing:
+            frames.setdefault(ticker, pd.DataFrame())
+    
+    return {ticker: frames[ticker] for ticker in dict.fromkeys(tickers)}
+
+def load_rollup(kind, ticker, db_params=None):
+    """Load a ticker's precomputed 'weekly' or 'monthly' stats rows maintained by the updater."""
+    cached = _cache.get('rollup', (kind, ticker))
+    if cached is not None:
+        return cached
+    
+    if db_params is None:
+        db_params = get_db_params()
+    
+    table_name, start_col = ROLLUP_TABLES[kind]
+    query = text(f"SELECT * FROM {table_name} WHERE ticker = :ticker ORDER BY {start_col}")
+    df = pd.read_sql(query, get_engine(db_params), params={"ticker": ticker})
+    for col in (start_col, start_col.replace('start', 'end')):
+        df[col] = pd.to_datetime(df[col])
+    print(f"Loaded {len(df)} {kind} rollup rows for {ticker}")
+    _cache.set('rollup', (kind, ticker), df)
+    return df
+
+def load_all_data(ticker="BTC", start=None, end=None, asof=False):
+    """Load and merge all required data for a ticker.
+    
+    With start/end only that date range and the dashboard's price columns are
+    read from the database (e.g. years_to_range([2024]) for a single year).
+    asof=True attaches the latest earlier F&G value to days without one.
+    """
+    start, end, _ = normalize_range(start, end)
+    ranged = start is not None or end is not None
+    fg_df = load_fear_greed_data(since=start) if start is not None else load_fear_greed_data()
     
     if ticker == "BTC":
-        price_df = load_btc_daily_data()
-        price_df['date'] = pd.to_datetime(price_df['date']).dt.date
+        price_df = load_btc_daily_data(start=start, end=end,
+                                       columns=BTC_PRICE_COLUMNS if ranged else None)
     else:
         # Load from PostgreSQL for MSTR, TSLA, HOOD
-        price_df = load_stock_daily_data(ticker)
+        price_df = load_stock_daily_data(ticker, start=start, end=end,
+                                         columns=STOCK_PRICE_COLUMNS if ranged else None)
         
         if price_df.empty:
             print(f"No data in PostgreSQL for {ticker}, please run update first")
             return pd.DataFrame()
         
-        price_df['date'] = pd.to_datetime(price_df['date']).dt.date
         price_df = price_df.rename(columns={
             'open_price': 'market_open_price',
             'close_price': 'market_close_price',
@@ -106,14 +375,18 @@ def load_all_data(ticker="BTC"):
             'low_price': 'daily_low'
         })
     
-    merged_df = pd.merge(price_df, fg_df, on='date', how='inner')
-    merged_df = merged_df.sort_values('date')
+    merged_df = apply_schema(merge_fear_greed(price_df, fg_df, asof=asof))
     print(f"Merged data: {len(merged_df)} records for {ticker}")
     return merged_df
 
-def clear_cache():
-    """Clear the data cache."""
-    global _cache
-    _cache = {}
-    print("Cache cleared")
+def clear_cache(dataset=None, ticker=None):
+    """Invalidate cached data for one dataset/ticker ('btc', 'stock', 'fear_greed'), or everything.
+    
+    Ranged loads of the ticker are dropped along with its full-history entry.
+    """
+    _cache.invalidate(dataset, ticker)
+    print(f"Cache cleared ({dataset or 'all'}{f' {ticker}' if ticker else ''})")
 
+def get_cache_stats():
+    """Return hit/miss/eviction counters and size of the in-memory data cache."""
+    return _cache.stats()
@@ -5,6 +5,10 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from data.market_sentiment import MARKET_SENTIMENT, get_fg_emoji, get_fg_classification
+from data import bucketing
+
+# Price change bucket edges shared by the daily and weekly distributions
+DEFAULT_BUCKET_BINS = [-0.5, -0.2, -0.15, -0.1, -0.05, 0, 0.05, 0.1, 0.15, 0.2, 0.5]
 
 def add_market_sentiment(df):
     """Add market sentiment column based on year."""
@@ -13,130 +17,219 @@ def add_market_sentiment(df):
     df['market_sentiment'] = df['year'].map(MARKET_SENTIMENT)
     return df
 
+WEEKDAY_FG_COLUMNS = ['fg_mon', 'fg_tue', 'fg_wed', 'fg_thu', 'fg_fri']
+
 def calculate_weekly_stats(df):
     """Calculate weekly statistics using first/last trading day of week (handles holidays)."""
-    df = df.copy()
-    df['date'] = pd.to_datetime(df['date'])
-    df = df.sort_values('date')
-    df['weekday'] = df['date'].dt.weekday
-    # Use ISO calendar year and week for proper week grouping
-    df['iso_year'] = df['date'].dt.isocalendar().year
-    df['iso_week'] = df['date'].dt.isocalendar().week
-    df['month'] = df['date'].dt.month
-    
-    weekly_data = []
-    
-    for (year, week), group in df.groupby(['iso_year', 'iso_week']):
-        if len(group) < 2:  # Need at least 2 days for a valid week
-            continue
-        
-        # Sort by date and use first/last trading day (handles holiday weeks)
-        group = group.sort_values('date')
-        first_day = group.iloc[0]
-        last_day = group.iloc[-1]
-        
-        week_open = first_day['market_open_price']
-        week_close = last_day['market_close_price']
-        weekly_change = (week_close - week_open) / week_open
-        
-        intraweek_high = group['daily_high'].max()
-        intraweek_low = group['daily_low'].min()
-        high_excursion = (intraweek_high - week_open) / week_open
-        low_excursion = (week_open - intraweek_low) / week_open
-        max_excursion = max(abs(high_excursion), abs(low_excursion))
-        
-        # Get daily F&G values
-        fg_values = {}
-        for _, row in group.iterrows():
-            day_name = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri'][row['weekday']] if row['weekday'] < 5 else None
-            if day_name and 'value' in row:
-                fg_values[day_name] = row['value']
-        
-        fg_avg = group['value'].mean() if 'value' in group.columns else None
-        
-        week_start = first_day['date']
-        week_end = last_day['date']
-        month = week_start.month
-        
-        weekly_data.append({
-            'year': int(year),  # Use ISO year for consistency
-            'week': int(week),
-            'month': month,
-            'week_start': week_start,
-            'week_end': week_end,
-            'monday_open': week_open,  # Keep column name for compatibility
-            'friday_close': week_close,  # Keep column name for compatibility
-            'weekly_change': weekly_change,
-            'intraweek_high': intraweek_high,
-            'intraweek_low': intraweek_low,
-            'high_excursion': high_excursion,
-            'low_excursion': low_excursion,
-            'max_excursion': max_excursion,
-            'fg_avg': fg_avg,
-            'fg_mon': fg_values.get('Mon'),
-            'fg_tue': fg_values.get('Tue'),
-            'fg_wed': fg_values.get('Wed'),
-            'fg_thu': fg_values.get('Thu'),
-            'fg_fri': fg_values.get('Fri'),
-            'market_sentiment': MARKET_SENTIMENT.get(int(year), 'Unknown')
-        })
-    
-    return pd.DataFrame(weekly_data)
-
-def merge_fear_greed(price_df, fg_df):
-    """Merge price data with Fear & Greed data."""
-    price_df = price_df.copy()
-    fg_df = fg_df.copy()
-    price_df['date'] = pd.to_datetime(price_df['date']).dt.date
-    fg_df['date'] = pd.to_datetime(fg_df['date']).dt.date
-    merged = pd.merge(price_df, fg_df, on='date', how='inner')
-    return merged.sort_values('date')
+    if df.empty:
+        return pd.DataFrame()
+    
+    dates = pd.to_datetime(df['date'])
+    iso = dates.dt.isocalendar()
+    has_fg = 'value' in df.columns
+    
+    frame = pd.DataFrame({
+        'date': dates.values,
+        'iso_year': iso['year'].astype('int64').values,
+        'iso_week': iso['week'].astype('int64').values,
+        'weekday': dates.dt.weekday.values,
+        'market_open_price': df['market_open_price'].values,
+        'market_close_price': df['market_close_price'].values,
+        'daily_high': df['daily_high'].values,
+        'daily_low': df['daily_low'].values,
+    })
+    if has_fg:
+        frame['value'] = df['value'].values
+    frame = frame.sort_values('date', kind='stable')
+    
+    keys = ['iso_year', 'iso_week']
+    grouped = frame.groupby(keys, sort=True)
+    weekly = grouped.agg(
+        n_days=('date', 'size'),
+        intraweek_high=('daily_high', 'max'),
+        intraweek_low=('daily_low', 'min'),
+    )
+    first_day = frame.drop_duplicates(keys, keep='first').set_index(keys)
+    last_day = frame.drop_duplicates(keys, keep='last').set_index(keys)
+    weekly['week_start'] = first_day['date']
+    weekly['week_end'] = last_day['date']
+    weekly['monday_open'] = first_day['market_open_price']  # Keep column name for compatibility
+    weekly['friday_close'] = last_day['market_close_price']  # Keep column name for compatibility
+    
+    if has_fg:
+        weekly['fg_avg'] = grouped['value'].mean()
+        weekdays = frame[frame['weekday'] < 5].drop_duplicates(keys + ['weekday'], keep='last')
+        fg_by_day = weekdays.set_index(keys + ['weekday'])['value'].unstack('weekday')
+        fg_by_day = fg_by_day.reindex(index=weekly.index, columns=range(5))
+        fg_by_day.columns = WEEKDAY_FG_COLUMNS
+        weekly = weekly.join(fg_by_day)
+    else:
+        weekly['fg_avg'] = None
+        for col in WEEKDAY_FG_COLUMNS:
+            weekly[col] = None
+    
+    # Need at least 2 days for a valid week
+    weekly = weekly[weekly['n_days'] >= 2].reset_index()
+    if weekly.empty:
+        return pd.DataFrame()
+    
+    week_open = weekly['monday_open']
+    weekly['weekly_change'] = (weekly['friday_close'] - week_open) / week_open
+    weekly['high_excursion'] = (weekly['intraweek_high'] - week_open) / week_open
+    weekly['low_excursion'] = (week_open - weekly['intraweek_low']) / week_open
+    weekly['max_excursion'] = np.maximum(weekly['high_excursion'].abs(), weekly['low_excursion'].abs())
+    weekly['year'] = weekly['iso_year'].astype(int)  # Use ISO year for consistency
+    weekly['week'] = weekly['iso_week'].astype(int)
+    weekly['month'] = weekly['week_start'].dt.month
+    weekly['market_sentiment'] = weekly['year'].map(MARKET_SENTIMENT).fillna('Unknown')
+    
+    return weekly[[
+        'year', 'week', 'month', 'week_start', 'week_end',
+        'monday_open', 'friday_close', 'weekly_change',
+        'intraweek_high', 'intraweek_low', 'high_excursion', 'low_excursion', 'max_excursion',
+        'fg_avg', *WEEKDAY_FG_COLUMNS, 'market_sentiment'
+    ]]
 
-def create_weekly_buckets(df, bins=None):
-    """Create bucket distribution for weekly price changes."""
-    if bins is None:
-        bins = [-0.5, -0.2, -0.15, -0.1, -0.05, 0, 0.05, 0.1, 0.15, 0.2, 0.5]
+def calculate_monthly_stats(df):
+    """Calculate calendar-month statistics with the same definitions as calculate_weekly_stats."""
+    if df.empty:
+        return pd.DataFrame()
     
-    df = df.copy()
-    df['change_bucket'] = pd.cut(df['weekly_change'], bins=bins, include_lowest=True)
-    df['change_bucket'] = df['change_bucket'].astype(str)
-    
-    # Group by year only (removed market_sentiment)
-    pivot = df.groupby(['year', 'change_bucket']).size().reset_index(name='count')
-    yearly_totals = pivot.groupby('year')['count'].sum()
-    pivot['percentage'] = pivot.apply(
-        lambda x: (x['count'] / yearly_totals[x['year']]) * 100,
-        axis=1
+    dates = pd.to_datetime(df['date'])
+    has_fg = 'value' in df.columns
+    
+    frame = pd.DataFrame({
+        'date': dates.values,
+        'year': dates.dt.year.values,
+        'month': dates.dt.month.values,
+        'market_open_price': df['market_open_price'].values,
+        'market_close_price': df['market_close_price'].values,
+        'daily_high': df['daily_high'].values,
+        'daily_low': df['daily_low'].values,
+        'value': df['value'].values if has_fg else np.nan,
+    })
+    frame = frame.sort_values('date', kind='stable')
+    
+    keys = ['year', 'month']
+    grouped = frame.groupby(keys, sort=True)
+    monthly = grouped.agg(
+        n_days=('date', 'size'),
+        intramonth_high=('daily_high', 'max'),
+        intramonth_low=('daily_low', 'min'),
+        fg_avg=('value', 'mean'),
     )
+    first_day = frame.drop_duplicates(keys, keep='first').set_index(keys)
+    last_day = frame.drop_duplicates(keys, keep='last').set_index(keys)
+    monthly['month_start'] = first_day['date']
+    monthly['month_end'] = last_day['date']
+    monthly['month_open'] = first_day['market_open_price']
+    monthly['month_close'] = last_day['market_close_price']
+    
+    # Need at least 2 days for a valid month
+    monthly = monthly[monthly['n_days'] >= 2].reset_index()
+    if monthly.empty:
+        return pd.DataFrame()
+    
+    month_open = monthly['month_open']
+    monthly['monthly_change'] = (monthly['month_close'] - month_open) / month_open
+    monthly['high_excursion'] = (monthly['intramonth_high'] - month_open) / month_open
+    monthly['low_excursion'] = (month_open - monthly['intramonth_low']) / month_open
+    monthly['max_excursion'] = np.maximum(monthly['high_excursion'].abs(), monthly['low_excursion'].abs())
+    monthly['market_sentiment'] = monthly['year'].map(MARKET_SENTIMENT).fillna('Unknown')
+    
+    return monthly[[
+        'year', 'month', 'month_start', 'month_end',
+        'month_open', 'month_close', 'monthly_change',
+        'intramonth_high', 'intramonth_low', 'high_excursion', 'low_excursion', 'max_excursion',
+        'fg_avg', 'market_sentiment'
+    ]]
+
+def date_to_day_keys(dates):
+    """Integer day numbers (days since 1970-01-01) for a date column."""
+    return pd.to_datetime(dates).to_numpy().astype('datetime64[D]').astype(np.int64)
+
+def merge_fear_greed(price_df, fg_df, asof=False, tolerance_days=3):
+    """Join price rows to Fear & Greed values on sorted integer day keys.
     
+    Exact mode keeps price days that have an F&G value (an inner join). With
+    asof=True each price day takes the latest F&G value at most tolerance_days
+    earlier, which covers gaps such as holidays or missing F&G days. Duplicate
+    F&G days keep the last row. Returns rows sorted by date with a datetime64 date.
+    """
+    price_days = date_to_day_keys(price_df['date'])
+    fg_days = date_to_day_keys(fg_df['date'])
+    
+    price_order = np.argsort(price_days, kind='stable')
+    price_days = price_days[price_order]
+    fg_order = np.argsort(fg_days, kind='stable')
+    fg_days = fg_days[fg_order]
+    last_of_day = np.r_[fg_days[1:] != fg_days[:-1], True] if len(fg_days) else np.array([], dtype=bool)
+    fg_days = fg_days[last_of_day]
+    fg_rows = fg_order[last_of_day]
+    
+    if len(fg_days) == 0:
+        pos = np.zeros(len(price_days), dtype=np.intp)
+        match = np.zeros(len(price_days), dtype=bool)
+    elif asof:
+        pos = np.searchsorted(fg_days, price_days, side='right') - 1
+        match = (pos >= 0) & (price_days - fg_days[pos.clip(0)] <= tolerance_days)
+    else:
+        pos = np.searchsorted(fg_days, price_days, side='left').clip(max=len(fg_days) - 1)
+        match = fg_days[pos] == price_days
+    
+    left = price_df.take(price_order[match]).reset_index(drop=True)
+    left['date'] = price_days[match].astype('datetime64[D]').astype('datetime64[ns]')
+    right = fg_df.drop(columns='date').take(fg_rows[pos[match]]).reset_index(drop=True)
+    return pd.concat([left, right], axis=1)
+
+def bucket_change_distribution(years, changes, bins=None):
+    """Count changes per (year, change_bucket) and each bucket's share of its year in one vectorized pass."""
+    if bins is None:
+        bins = DEFAULT_BUCKET_BINS
+    
+    counts = bucketing.count_by_year(years, changes, bins)
+    pivot = bucketing.distribution_frame(counts)
+    labels = np.asarray(bucketing.bucket_labels(bins), dtype=object)
+    pivot.insert(1, 'change_bucket', labels[pivot.pop('bucket_code').to_numpy()])
     return pivot
 
+def create_weekly_buckets(df, bins=None):
+    """Create bucket distribution for weekly price changes."""
+    return bucket_change_distribution(df['year'].to_numpy(), df['weekly_change'].to_numpy(), bins)
+
 
 def create_daily_buckets(df, bins=None):
     """Create bucket distribution for daily price changes."""
-    if bins is None:
-        bins = [-0.5, -0.2, -0.15, -0.1, -0.05, 0, 0.05, 0.1, 0.15, 0.2, 0.5]
-    
-    df = df.copy()
-    df['date'] = pd.to_datetime(df['date'])
-    df['year'] = df['date'].dt.year
+    years = pd.to_datetime(df['date']).dt.year.to_numpy()
     
     # Calculate daily change if not present
-    if 'daily_change' not in df.columns:
-        df['daily_change'] = (df['market_close_price'] - df['market_open_price']) / df['market_open_price']
-    
-    df['change_bucket'] = pd.cut(df['daily_change'], bins=bins, include_lowest=True)
-    df['change_bucket'] = df['change_bucket'].astype(str)
-    
-    # Group by year only
-    pivot = df.groupby(['year', 'change_bucket']).size().reset_index(name='count')
-    yearly_totals = pivot.groupby('year')['count'].sum()
-    pivot['percentage'] = pivot.apply(
-        lambda x: (x['count'] / yearly_totals[x['year']]) * 100,
-        axis=1
-    )
+    if 'daily_change' in df.columns:
+        changes = df['daily_change'].to_numpy()
+    else:
+        open_price = df['market_open_price'].to_numpy()
+        changes = (df['market_close_price'].to_numpy() - open_price) / open_price
     
-    return pivot
+    return bucket_change_distribution(years, changes, bins)
+
+def add_daily_change(df):
+    """Add the open-to-close daily_change column used by the daily buckets."""
+    df = df.copy()
+    df['daily_change'] = (df['market_close_price'] - df['market_open_price']) / df['market_open_price']
+    return df
+
+def build_bucket_index(df, change_col, bins=None):
+    """Bucket df[change_col] once; return per-year counts and (year, bucket code) -> row positions."""
+    if bins is None:
+        bins = DEFAULT_BUCKET_BINS
+    return bucketing.build_bucket_index(df['year'].values, df[change_col].values, bins)
+
+def lookup_bucket_rows(df, bucket_index, bucket_code, year=None):
+    """Return the rows of df in one bucket (all years when year is None)."""
+    return df.iloc[bucketing.lookup_positions(bucket_index, bucket_code, year)]
+
+def bucket_counts_from_index(bucket_index, years=None):
+    """Build the (year, bucket_code, count, percentage) distribution from a bucket index."""
+    return bucketing.distribution_frame(bucket_index, years)
 
 def get_breach_color(max_excursion, threshold=0.10):
     """Return color based on breach risk."""
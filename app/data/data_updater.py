@@ -2,12 +2,25 @@
 import pandas as pd
 import requests
 import yfinance as yf
-from datetime import date, time, timedelta
-from sqlalchemy import create_engine, text, types
+from datetime import date, timedelta
+from sqlalchemy import text, types, table, column, inspect
+from sqlalchemy.exc import IntegrityError
+from data.db import get_engine
+from data.rate_limit import wait_for_slot
+from data.rollups import refresh_rollups
+from data.data_loader import update_fear_greed_history, clear_cache
 import time as time_module
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # CoinAPI key from your notebook
 COINAPI_KEY = '44321bcd-b97e-4fdd-8098-f114eed3fba7'
+# Overridable so refreshes can be benchmarked against a local fake server
+COINAPI_BASE_URL = os.environ.get('COINAPI_BASE_URL', 'https://rest.coinapi.io/v1/exchangerate')
+
+# Where an empty database starts its historical load
+BTC_HISTORY_START = date(2020, 1, 2)
+STOCK_HISTORY_START = date(2020, 1, 1)
 
 def get_db_params():
     """Return database connection parameters."""
@@ -24,8 +37,7 @@ def get_latest_date_in_db(db_params=None):
     if db_params is None:
         db_params = get_db_params()
     
-    conn_string = f"postgresql://{db_params['user']}:{db_params['password']}@{db_params['host']}:{db_params['port']}/{db_params['database']}"
-    engine = create_engine(conn_string)
+    engine = get_engine(db_params)
     
     query = "SELECT MAX(date) as latest_date FROM bitcoin_prices_daily"
     result = pd.read_sql(query, engine)
@@ -37,8 +49,7 @@ def get_latest_date_in_db(db_params=None):
 
 def fetch_btc_price_data(start_date, end_date):
     """Fetch BTC price data from CoinAPI."""
-    base_url = "https://rest.coinapi.io/v1/exchangerate"
-    url = f"{base_url}/BTC/USD/history"
+    url = f"{COINAPI_BASE_URL}/BTC/USD/history"
     
     headers = {"X-CoinAPI-Key": COINAPI_KEY}
     params = {
@@ -48,6 +59,7 @@ def fetch_btc_price_data(start_date, end_date):
         "limit": 100000
     }
     
+    wait_for_slot('coinapi')
     response = requests.get(url, headers=headers, params=params, timeout=60)
     data = response.json()
     
@@ -62,71 +74,76 @@ def transform_to_daily(df):
     if df.empty:
         return pd.DataFrame()
     
-    df['time_open'] = pd.to_datetime(df['time_open'])
-    df['time_close'] = pd.to_datetime(df['time_close'])
-    
-    is_tz_aware = df['time_open'].dt.tz is not None
-    if is_tz_aware:
-        df['time_open_et'] = df['time_open'].dt.tz_convert('US/Eastern')
-        df['time_close_et'] = df['time_close'].dt.tz_convert('US/Eastern')
-    else:
-        df['time_open_et'] = df['time_open'].dt.tz_localize('UTC').dt.tz_convert('US/Eastern')
-        df['time_close_et'] = df['time_close'].dt.tz_localize('UTC').dt.tz_convert('US/Eastern')
-    
-    df['date'] = df['time_open_et'].dt.date
-    daily_data = []
-    
-    for date_val, group in df.groupby('date'):
-        date_dt = pd.to_datetime(date_val)
-        market_open = pd.Timestamp.combine(date_dt.date(), time(9, 30)).tz_localize('US/Eastern')
-        market_close = pd.Timestamp.combine(date_dt.date(), time(16, 0)).tz_localize('US/Eastern')
-        
-        open_price_row = group[(group['time_open_et'] <= market_open) & (group['time_close_et'] >= market_open)]
-        close_price_row = group[(group['time_open_et'] <= market_close) & (group['time_close_et'] >= market_close)]
-        
-        market_open_price, market_close_price = None, None
-        market_open_timestamp, market_close_timestamp = None, None
-        
-        if not open_price_row.empty:
-            market_open_price = open_price_row['rate_open'].iloc[0]
-            market_open_timestamp = market_open
-        else:
-            before_open = group[group['time_open_et'] <= market_open]
-            if not before_open.empty:
-                market_open_price = before_open.iloc[-1]['rate_close']
-                market_open_timestamp = before_open.iloc[-1]['time_close_et']
-        
-        if not close_price_row.empty:
-            market_close_price = close_price_row['rate_close'].iloc[0]
-            market_close_timestamp = market_close
-        else:
-            after_close = group[group['time_close_et'] >= market_close]
-            if not after_close.empty:
-                market_close_price = after_close.iloc[0]['rate_open']
-                market_close_timestamp = after_close.iloc[0]['time_open_et']
-        
-        daily_data.append({
-            'date': date_val,
-            'market_open_price': market_open_price,
-            'market_open_timestamp': market_open_timestamp,
-            'market_close_price': market_close_price,
-            'market_close_timestamp': market_close_timestamp,
-            'avg_price': group['rate_close'].mean(),
-            'daily_high': group['rate_high'].max(),
-            'daily_low': group['rate_low'].min(),
-        })
-    
-    if not daily_data:
-        return pd.DataFrame()
-    
-    daily_df = pd.DataFrame(daily_data)
-    daily_df['date'] = pd.to_datetime(daily_df['date'])
+    time_open = pd.to_datetime(df['time_open'])
+    time_close = pd.to_datetime(df['time_close'])
+    if time_open.dt.tz is None:
+        time_open = time_open.dt.tz_localize('UTC')
+        time_close = time_close.dt.tz_localize('UTC')
+    
+    bars = pd.DataFrame({
+        'time_open_et': time_open.dt.tz_convert('US/Eastern'),
+        'time_close_et': time_close.dt.tz_convert('US/Eastern'),
+        'rate_open': df['rate_open'],
+        'rate_close': df['rate_close'],
+        'rate_high': df['rate_high'],
+        'rate_low': df['rate_low'],
+    })
+    bars = bars.sort_values('time_open_et', kind='stable')
+    
+    # Local calendar day, and 9:30/16:00 wall-clock times localized per day (DST-safe)
+    bars['date'] = bars['time_open_et'].dt.tz_localize(None).dt.normalize()
+    market_open = (bars['date'] + pd.Timedelta(hours=9, minutes=30)).dt.tz_localize('US/Eastern')
+    market_close = (bars['date'] + pd.Timedelta(hours=16)).dt.tz_localize('US/Eastern')
+    
+    def pick(mask, keep):
+        """First or last bar per day among rows matching mask."""
+        return bars[mask].drop_duplicates('date', keep=keep).set_index('date')
+    
+    open_bar = pick((bars['time_open_et'] <= market_open) & (bars['time_close_et'] >= market_open), 'first')
+    before_open = pick(bars['time_open_et'] <= market_open, 'last')
+    close_bar = pick((bars['time_open_et'] <= market_close) & (bars['time_close_et'] >= market_close), 'first')
+    after_close = pick(bars['time_close_et'] >= market_close, 'first')
+    
+    daily_df = bars.groupby('date').agg(
+        avg_price=('rate_close', 'mean'),
+        daily_high=('rate_high', 'max'),
+        daily_low=('rate_low', 'min'),
+    )
+    day_open = market_open.groupby(bars['date']).first()
+    day_close = market_close.groupby(bars['date']).first()
+    
+    # Bar spanning 9:30 -> its open; otherwise last bar before 9:30 -> its close
+    has_open_bar = daily_df.index.isin(open_bar.index)
+    daily_df['market_open_price'] = open_bar['rate_open'].reindex(daily_df.index).where(
+        has_open_bar, before_open['rate_close'].reindex(daily_df.index))
+    daily_df['market_open_timestamp'] = day_open.where(
+        has_open_bar, before_open['time_close_et'].reindex(daily_df.index))
+    
+    # Bar spanning 16:00 -> its close; otherwise first bar after 16:00 -> its open
+    has_close_bar = daily_df.index.isin(close_bar.index)
+    daily_df['market_close_price'] = close_bar['rate_close'].reindex(daily_df.index).where(
+        has_close_bar, after_close['rate_open'].reindex(daily_df.index))
+    daily_df['market_close_timestamp'] = day_close.where(
+        has_close_bar, after_close['time_open_et'].reindex(daily_df.index))
+    
+    daily_df = daily_df.reset_index()[[
+        'date', 'market_open_price', 'market_open_timestamp', 'market_close_price',
+        'market_close_timestamp', 'avg_price', 'daily_high', 'daily_low'
+    ]]
     daily_df['daily_price_change'] = ((daily_df['daily_high'] - daily_df['daily_low']) / daily_df['daily_low']).round(2)
     daily_df['market_price_change'] = ((daily_df['market_close_price'] - daily_df['market_open_price']) / daily_df['market_open_price']).round(2)
     daily_df = daily_df.dropna(subset=['market_open_price'])
     
     return daily_df
 
+def update_rollups(ticker, since, db_params):
+    """Refresh a ticker's weekly/monthly rollup tables; a failure here never fails the price update."""
+    try:
+        written = refresh_rollups(ticker, update_fear_greed_history(), db_params, since=since)
+        print(f"Refreshed {ticker} rollups: {written['weekly']} weekly, {written['monthly']} monthly rows")
+    except Exception as e:
+        print(f"Could not refresh rollups for {ticker}: {str(e)}")
+
 def update_btc_database(df, db_params=None):
     """Insert new BTC records into the database."""
     if db_params is None:
@@ -135,8 +152,7 @@ def update_btc_database(df, db_params=None):
     if df.empty:
         return 0
     
-    conn_string = f"postgresql+psycopg2://{db_params['user']}:{db_params['password']}@{db_params['host']}:{db_params['port']}/{db_params['database']}"
-    engine = create_engine(conn_string)
+    engine = get_engine(db_params)
     
     df['updated_at'] = pd.Timestamp.now()
     
@@ -167,16 +183,24 @@ def update_btc_database(df, db_params=None):
         dtype=dtype
     )
     
+    update_rollups('BTC', df_to_insert['date'].min(), db_params)
     return len(df_to_insert)
 
-def update_btc_data():
+def report_progress(progress, percent, message):
+    """Forward a progress update to an optional progress(percent, message) callback."""
+    if progress is not None:
+        progress(percent, message)
+
+def update_btc_data(progress=None, db_params=None):
     """Main function to fetch and update BTC data."""
-    db_params = get_db_params()
+    if db_params is None:
+        db_params = get_db_params()
+    report_progress(progress, 5, "Checking latest BTC date")
     
     # Get latest date in database
     latest_date = get_latest_date_in_db(db_params)
     if latest_date is None:
-        latest_date = date(2020, 1, 1)
+        latest_date = BTC_HISTORY_START - timedelta(days=1)
     
     # Fetch data from day after latest to today
     start_date = latest_date + timedelta(days=1)
@@ -186,6 +210,7 @@ def update_btc_data():
         return {"status": "up_to_date", "message": f"Database already up to date (latest: {latest_date})", "new_records": 0}
     
     print(f"Fetching BTC data from {start_date} to {end_date}...")
+    report_progress(progress, 20, f"Fetching BTC data from {start_date}")
     
     # Fetch from CoinAPI
     raw_df = fetch_btc_price_data(start_date, end_date)
@@ -193,11 +218,13 @@ def update_btc_data():
         return {"status": "no_data", "message": "No new data available from API", "new_records": 0}
     
     # Transform to daily
+    report_progress(progress, 60, "Transforming BTC bars to daily")
     daily_df = transform_to_daily(raw_df)
     if daily_df.empty:
         return {"status": "no_data", "message": "No valid daily data after transformation", "new_records": 0}
     
     # Update database
+    report_progress(progress, 80, "Writing BTC records")
     new_records = update_btc_database(daily_df, db_params)
     
     new_latest = get_latest_date_in_db(db_params)
@@ -217,8 +244,7 @@ def get_latest_stock_date(ticker, db_params=None):
     if db_params is None:
         db_params = get_db_params()
     
-    conn_string = f"postgresql://{db_params['user']}:{db_params['password']}@{db_params['host']}:{db_params['port']}/{db_params['database']}"
-    engine = create_engine(conn_string)
+    engine = get_engine(db_params)
     
     query = text("SELECT MAX(date) as latest_date FROM stock_prices_daily WHERE ticker = :ticker")
     with engine.connect() as conn:
@@ -235,6 +261,7 @@ def fetch_stock_data_yahoo(ticker, start_date, end_date):
     
     for attempt in range(max_retries):
         try:
+            wait_for_slot('yahoo')
             stock = yf.Ticker(ticker)
             df = stock.history(start=start_date, end=end_date + timedelta(days=1), interval="1d")
             
@@ -267,6 +294,100 @@ def fetch_stock_data_yahoo(ticker, start_date, end_date):
     return pd.DataFrame()
 
 
+STOCK_UPSERT_COLUMNS = ['ticker', 'date', 'open_price', 'high_price', 'low_price',
+                        'close_price', 'volume', 'updated_at']
+
+# Rows per multi-row VALUES statement (keeps bind params under driver limits)
+UPSERT_BATCH_SIZE = 500
+
+# Unique index created when stock_prices_daily has no (ticker, date) key for ON CONFLICT
+STOCK_KEY_INDEX = 'stock_prices_daily_ticker_date_key'
+
+# Databases (engine URLs) whose stock_prices_daily key was already checked in this process
+_stock_key_checked = set()
+
+def ensure_stock_key(conn):
+    """Make sure stock_prices_daily has the unique (ticker, date) key the upserts conflict on.
+
+    A table keyed by a primary key, unique constraint or unique index on
+    (ticker, date) is left alone; otherwise the unique index is created.
+    Duplicate rows that prevent this raise a RuntimeError naming the fix.
+    Checked once per database per process.
+    """
+    url = str(conn.engine.url)
+    if url in _stock_key_checked:
+        return
+    inspector = inspect(conn)
+    key = {'ticker', 'date'}
+    keyed = (
+        set(inspector.get_pk_constraint('stock_prices_daily')['constrained_columns']) == key
+        or any(set(c['column_names']) == key for c in inspector.get_unique_constraints('stock_prices_daily'))
+        or any(i['unique'] and set(i['column_names']) == key for i in inspector.get_indexes('stock_prices_daily'))
+    )
+    if not keyed:
+        try:
+            conn.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS {STOCK_KEY_INDEX} ON stock_prices_daily (ticker, date)"))
+        except IntegrityError as e:
+            raise RuntimeError(
+                "stock_prices_daily has duplicate (ticker, date) rows, so the unique key its upserts "
+                "need cannot be created. Delete the duplicates, then run: "
+                f"CREATE UNIQUE INDEX {STOCK_KEY_INDEX} ON stock_prices_daily (ticker, date)"
+            ) from e
+        print(f"Created unique index {STOCK_KEY_INDEX} on stock_prices_daily (ticker, date)")
+    _stock_key_checked.add(url)
+
+def upsert_stock_rows(conn, df_to_merge):
+    """Upsert prepared stock rows in set-based batches; return inserted/updated counts.
+
+    Existing (ticker, date) keys are read with one range query, then rows are
+    written with multi-row INSERT ... ON CONFLICT (ticker, date) DO UPDATE,
+    which needs the unique key ensure_stock_key checks for.
+    Works on PostgreSQL and SQLite; the caller owns the transaction.
+    """
+    if df_to_merge.empty:
+        return {"inserted": 0, "updated": 0}
+    
+    if conn.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif conn.dialect.name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"Upsert not supported for dialect {conn.dialect.name}")
+    ensure_stock_key(conn)
+    
+    stock_table = table('stock_prices_daily', *[column(name) for name in STOCK_UPSERT_COLUMNS])
+    
+    counts = {"inserted": 0, "updated": 0}
+    for ticker, ticker_rows in df_to_merge.groupby('ticker', sort=False):
+        existing_query = text("""
+            SELECT date FROM stock_prices_daily
+            WHERE ticker = :ticker AND date >= :start_date AND date <= :end_date
+        """)
+        existing = conn.execute(existing_query, {
+            "ticker": ticker,
+            "start_date": ticker_rows['date'].min(),
+            "end_date": ticker_rows['date'].max()
+        }).fetchall()
+        existing_dates = set(pd.to_datetime([row[0] for row in existing]).date)
+        updated = int(ticker_rows['date'].isin(existing_dates).sum())
+        counts["updated"] += updated
+        counts["inserted"] += len(ticker_rows) - updated
+    
+    records = df_to_merge[STOCK_UPSERT_COLUMNS].to_dict('records')
+    for record in records:
+        # Plain datetime binds on every driver (sqlite3 rejects pd.Timestamp)
+        record['updated_at'] = pd.Timestamp(record['updated_at']).to_pydatetime()
+    for start in range(0, len(records), UPSERT_BATCH_SIZE):
+        stmt = insert(stock_table).values(records[start:start + UPSERT_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['ticker', 'date'],
+            set_={name: stmt.excluded[name] for name in STOCK_UPSERT_COLUMNS[2:]}
+        )
+        conn.execute(stmt)
+    
+    return counts
+
+
 def update_stock_database(ticker, df, db_params=None):
     """Merge stock data into PostgreSQL using upsert (insert or update on conflict)."""
     if db_params is None:
@@ -275,8 +396,7 @@ def update_stock_database(ticker, df, db_params=None):
     if df.empty:
         return {"inserted": 0, "updated": 0}
     
-    conn_string = f"postgresql://{db_params['user']}:{db_params['password']}@{db_params['host']}:{db_params['port']}/{db_params['database']}"
-    engine = create_engine(conn_string)
+    engine = get_engine(db_params)
     
     # Transform DataFrame
     df_to_merge = pd.DataFrame({
@@ -289,61 +409,29 @@ def update_stock_database(ticker, df, db_params=None):
         'volume': df['Volume'].astype(int),
         'updated_at': pd.Timestamp.now()
     })
+    # Last row wins if the source repeats a date (matches the old row-by-row merge)
+    df_to_merge = df_to_merge.drop_duplicates(subset=['ticker', 'date'], keep='last')
     
-    inserted = 0
-    updated = 0
+    # Single transaction for the whole batch
+    with engine.begin() as conn:
+        counts = upsert_stock_rows(conn, df_to_merge)
     
-    with engine.connect() as conn:
-        for _, row in df_to_merge.iterrows():
-            # Check if record exists
-            check_query = text("SELECT id FROM stock_prices_daily WHERE ticker = :ticker AND date = :date")
-            result = conn.execute(check_query, {"ticker": row['ticker'], "date": row['date']})
-            existing = result.fetchone()
-            
-            if existing:
-                # Update existing record
-                update_query = text("""
-                    UPDATE stock_prices_daily 
-                    SET open_price = :open_price, high_price = :high_price, low_price = :low_price,
-                        close_price = :close_price, volume = :volume, updated_at = :updated_at
-                    WHERE ticker = :ticker AND date = :date
-                """)
-                conn.execute(update_query, {
-                    "ticker": row['ticker'], "date": row['date'],
-                    "open_price": row['open_price'], "high_price": row['high_price'],
-                    "low_price": row['low_price'], "close_price": row['close_price'],
-                    "volume": row['volume'], "updated_at": row['updated_at']
-                })
-                updated += 1
-            else:
-                # Insert new record
-                insert_query = text("""
-                    INSERT INTO stock_prices_daily (ticker, date, open_price, high_price, low_price, close_price, volume, updated_at)
-                    VALUES (:ticker, :date, :open_price, :high_price, :low_price, :close_price, :volume, :updated_at)
-                """)
-                conn.execute(insert_query, {
-                    "ticker": row['ticker'], "date": row['date'],
-                    "open_price": row['open_price'], "high_price": row['high_price'],
-                    "low_price": row['low_price'], "close_price": row['close_price'],
-                    "volume": row['volume'], "updated_at": row['updated_at']
-                })
-                inserted += 1
-        
-        conn.commit()
-    
-    return {"inserted": inserted, "updated": updated}
+    update_rollups(ticker, df_to_merge['date'].min(), db_params)
+    return counts
 
 
-def update_stock_data(ticker):
+def update_stock_data(ticker, fetch_fn=fetch_stock_data_yahoo, progress=None, db_params=None):
     """Main function to fetch and update stock data for a ticker."""
-    db_params = get_db_params()
+    if db_params is None:
+        db_params = get_db_params()
+    report_progress(progress, 5, f"Checking latest {ticker} date")
     
     # Get latest date for this ticker
     latest_date = get_latest_stock_date(ticker, db_params)
     
     if latest_date is None:
         # No data - historical load from 2020
-        start_date = date(2020, 1, 1)
+        start_date = STOCK_HISTORY_START
         print(f"No data for {ticker}, doing historical load from {start_date}")
     else:
         # Incremental load from max date (can update same day)
@@ -356,11 +444,13 @@ def update_stock_data(ticker):
         return {"status": "up_to_date", "message": f"{ticker} already up to date (latest: {latest_date})", "new_records": 0}
     
     # Fetch from Yahoo Finance
-    raw_df = fetch_stock_data_yahoo(ticker, start_date, end_date)
+    report_progress(progress, 20, f"Fetching {ticker} from {start_date}")
+    raw_df = fetch_fn(ticker, start_date, end_date)
     if raw_df.empty:
         return {"status": "rate_limited", "message": f"Rate limited or no data for {ticker}. Try again later.", "new_records": 0}
     
     # Merge into database
+    report_progress(progress, 70, f"Writing {ticker} records")
     result = update_stock_database(ticker, raw_df, db_params)
     
     new_latest = get_latest_stock_date(ticker, db_params)
@@ -372,3 +462,50 @@ def update_stock_data(ticker):
         "updated_records": result['updated'],
         "latest_date": str(new_latest)
     }
+
+
+# ============ Batch Refresh ============
+
+def refresh_tickers(tickers, max_workers=4, fetch_fn=fetch_stock_data_yahoo, db_params=None):
+    """Refresh a ticker universe concurrently through a bounded worker pool.
+    
+    Each upstream source is throttled by its shared token bucket (data.rate_limit),
+    so adding workers never exceeds the Yahoo/CoinAPI request rates. Cached
+    frames of every refreshed ticker are invalidated, as after a background
+    refresh job. Returns per-ticker results (with elapsed seconds) and the
+    overall wall-clock time.
+    """
+    def refresh_one(ticker):
+        started = time_module.perf_counter()
+        try:
+            if ticker == 'BTC':
+                result = update_btc_data(db_params=db_params)
+            else:
+                result = update_stock_data(ticker, fetch_fn, db_params=db_params)
+        except Exception as e:
+            result = {"status": "error", "message": f"{ticker}: {str(e)}", "new_records": 0}
+        finally:
+            # Next load picks up any rows written before a failure, too
+            clear_cache('btc' if ticker == 'BTC' else 'stock', ticker)
+        result['elapsed'] = time_module.perf_counter() - started
+        return result
+    
+    started = time_module.perf_counter()
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(refresh_one, ticker): ticker for ticker in dict.fromkeys(tickers)}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            results[ticker] = future.result()
+            print(f"{ticker}: {results[ticker]['status']} ({results[ticker]['elapsed']:.1f}s)")
+    clear_cache('fear_greed')
+    clear_cache('rollup')
+    
+    elapsed = time_module.perf_counter() - started
+    statuses = [r['status'] for r in results.values()]
+    return {
+        "results": results,
+        "elapsed": elapsed,
+        "succeeded": sum(status in ('success', 'up_to_date') for status in statuses),
+        "failed": sum(status not in ('success', 'up_to_date') for status in statuses),
+    }
@@ -0,0 +1,95 @@
+"""Process-wide pooled SQLAlchemy engines shared by the loader and updater."""
+import os
+import threading
+from sqlalchemy import create_engine, event
+
+# Pool settings applied to every engine created by get_engine()
+ENGINE_OPTIONS = {
+    'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+    'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+    'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') != '0',
+    'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+}
+
+_engines = {}
+_pool_stats = {}
+_lock = threading.Lock()
+
+def build_conn_string(db_params):
+    """Return the SQLAlchemy URL for a db_params dict.
+
+    A 'url' entry is used as-is (e.g. a SQLite file for offline benchmarks and tests).
+    """
+    if 'url' in db_params:
+        return db_params['url']
+    return f"postgresql+psycopg2://{db_params['user']}:{db_params['password']}@{db_params['host']}:{db_params['port']}/{db_params['database']}"
+
+def _track_pool(engine, stats):
+    """Attach pool event listeners that count connects and checkouts."""
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_conn, conn_record):
+        stats['connects'] += 1
+
+    @event.listens_for(engine, 'checkout')
+    def on_checkout(dbapi_conn, conn_record, conn_proxy):
+        stats['checkouts'] += 1
+
+    @event.listens_for(engine, 'checkin')
+    def on_checkin(dbapi_conn, conn_record):
+        stats['checkins'] += 1
+
+def get_engine(db_params):
+    """Return the shared engine for db_params, creating it lazily.
+
+    Engines are keyed by URL and process id, so a worker forked after the
+    parent created an engine gets its own pool instead of sharing sockets.
+    """
+    url = build_conn_string(db_params)
+    key = (url, os.getpid())
+    engine = _engines.get(key)
+    if engine is not None:
+        return engine
+
+    with _lock:
+        if key not in _engines:
+            # Drop pools inherited from a parent process without closing its sockets
+            for stale_key in [k for k in _engines if k[1] != os.getpid()]:
+                _engines.pop(stale_key).dispose(close=False)
+                _pool_stats.pop(stale_key, None)
+            engine = create_engine(url, **ENGINE_OPTIONS)
+            stats = {'connects': 0, 'checkouts': 0, 'checkins': 0}
+            _track_pool(engine, stats)
+            _engines[key] = engine
+            _pool_stats[key] = stats
+        return _engines[key]
+
+def configure_engine(**options):
+    """Update pool settings (pool_size, max_overflow, pool_pre_ping, pool_recycle) and reset engines."""
+    unknown = set(options) - set(ENGINE_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown engine options: {sorted(unknown)}")
+    ENGINE_OPTIONS.update(options)
+    dispose_engines()
+
+def dispose_engines():
+    """Close all pooled connections owned by this process."""
+    with _lock:
+        for key in list(_engines):
+            _engines.pop(key).dispose(close=key[1] == os.getpid())
+            _pool_stats.pop(key, None)
+
+def get_pool_stats():
+    """Return pool counters and current checkout state per engine URL (password masked)."""
+    report = {}
+    with _lock:
+        for (url, pid), engine in _engines.items():
+            if pid != os.getpid():
+                continue
+            pool = engine.pool
+            report[engine.url.render_as_string(hide_password=True)] = {
+                **_pool_stats[(url, pid)],
+                'pool_size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'overflow': pool.overflow(),
+            }
+    return report
@@ -0,0 +1,68 @@
+"""Persistent columnar (Parquet) cache of price and Fear & Greed history per dataset and ticker."""
+import os
+import threading
+import pandas as pd
+
+CACHE_DIR = os.environ.get(
+    'FG_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache')
+)
+
+_lock = threading.Lock()
+
+def get_cache_path(dataset, key=None):
+    """Return the Parquet file path for a dataset (and optional ticker key)."""
+    name = f"{dataset}_{key}" if key else dataset
+    return os.path.join(CACHE_DIR, f"{name}.parquet")
+
+def read_cached(dataset, key=None, date_col='date'):
+    """Read a cached frame, or return None if nothing is stored yet."""
+    path = get_cache_path(dataset, key)
+    if not os.path.exists(path):
+        return None
+    try:
+        df = pd.read_parquet(path)
+    except Exception as e:
+        print(f"Ignoring unreadable cache file {path}: {str(e)}")
+        return None
+    if date_col in df.columns:
+        df[date_col] = pd.to_datetime(df[date_col])
+    return df
+
+def get_watermark(df, date_col='date'):
+    """Return the latest date held in a cached frame (None if empty)."""
+    if df is None or df.empty:
+        return None
+    return pd.to_datetime(df[date_col]).max().date()
+
+def write_cached(dataset, df, key=None):
+    """Atomically replace the cached frame for a dataset/key."""
+    path = get_cache_path(dataset, key)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with _lock:
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+def merge_cached(cached_df, new_df, key_cols=('date',), date_col='date'):
+    """Merge new rows over cached rows; new rows win on key collisions."""
+    if cached_df is None or cached_df.empty:
+        merged = new_df
+    elif new_df is None or new_df.empty:
+        merged = cached_df
+    else:
+        merged = pd.concat([cached_df, new_df], ignore_index=True)
+        merged = merged.drop_duplicates(subset=list(key_cols), keep='last')
+    return merged.sort_values(date_col).reset_index(drop=True)
+
+def clear_disk_cache(dataset=None, key=None):
+    """Delete cached files for one dataset/key, or the whole cache directory contents."""
+    if not os.path.isdir(CACHE_DIR):
+        return
+    with _lock:
+        for name in os.listdir(CACHE_DIR):
+            if not name.endswith('.parquet'):
+                continue
+            if dataset is not None and name != os.path.basename(get_cache_path(dataset, key)):
+                continue
+            os.remove(os.path.join(CACHE_DIR, name))
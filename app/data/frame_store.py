@@ -0,0 +1,128 @@
+"""Server-side registry of processed frames, referenced from the browser by a small handle."""
+import threading
+from collections import OrderedDict
+import pandas as pd
+from data.cache import frame_nbytes
+from data.schema import apply_schema
+
+# Versions kept per ticker so callbacks still holding an older handle can resolve it
+MAX_VERSIONS_PER_TICKER = 2
+
+# Memoized derived results (pivots, figures) kept per data version, LRU-evicted
+MAX_MEMO_PER_VERSION = 32
+
+_frames = {}
+_lock = threading.Lock()
+
+def compute_data_version(df):
+    """Return a short content hash identifying this version of a frame."""
+    if df.empty:
+        return "empty"
+    row_hashes = pd.util.hash_pandas_object(df, index=False).values
+    return f"{len(df)}-{int(row_hashes.sum()):016x}"
+
+def data_version(raw_df):
+    """Return the version store_frames registers raw_df under."""
+    return compute_data_version(apply_schema(raw_df))
+
+def find_frames(ticker, version):
+    """Return the handle of a registered (ticker, version) and mark it newest, or None."""
+    with _lock:
+        entry = _frames.pop((ticker, version), None)
+        if entry is None:
+            return None
+        _frames[(ticker, version)] = entry
+    return {'ticker': ticker, 'version': version}
+
+def store_frames(ticker, raw_df, weekly_df, bucket_index=None, version=None):
+    """Register raw and weekly frames (plus their bucket indexes) and return the handle for dcc.Store.
+
+    Pass version when it was already computed with data_version(raw_df).
+    """
+    raw_df = apply_schema(raw_df)
+    if version is None:
+        version = compute_data_version(raw_df)
+
+    with _lock:
+        # A registered version keeps its frames, bucket index and memoized figures;
+        # re-inserting it only marks it as the ticker's newest
+        entry = _frames.pop((ticker, version), None)
+        if entry is None:
+            entry = {
+                'raw': raw_df,
+                'weekly': weekly_df,
+                'bucket_index': bucket_index or {},
+                'memo': OrderedDict()
+            }
+        _frames[(ticker, version)] = entry
+        versions = [key for key in _frames if key[0] == ticker]
+        for key in versions[:-MAX_VERSIONS_PER_TICKER]:
+            del _frames[key]
+
+    return {'ticker': ticker, 'version': version}
+
+def get_frames(handle):
+    """Return (raw_df, weekly_df) for a handle, or None if this process does not hold it.
+
+    Frames are shared, not copied: callers must treat them as read-only.
+    """
+    if not handle:
+        return None
+    with _lock:
+        entry = _frames.get((handle['ticker'], handle['version']))
+    if entry is None:
+        return None
+    return entry['raw'], entry['weekly']
+
+def get_bucket_index(handle, mode):
+    """Return the precomputed (year, bucket) -> row positions index for 'daily' or 'weekly'."""
+    with _lock:
+        entry = _frames.get((handle['ticker'], handle['version']))
+    if entry is None:
+        return None
+    return entry['bucket_index'].get(mode)
+
+def memoize(handle, key, compute):
+    """Return compute() for key under a data version, computing it once per version.
+
+    Results live with the version's frames, so they disappear when new data
+    replaces that version. Results are shared: callers must not mutate them.
+    """
+    frame_key = (handle['ticker'], handle['version'])
+    with _lock:
+        entry = _frames.get(frame_key)
+        if entry is not None and key in entry['memo']:
+            entry['memo'].move_to_end(key)
+            return entry['memo'][key]
+    
+    result = compute()
+    
+    with _lock:
+        entry = _frames.get(frame_key)
+        if entry is not None:
+            entry['memo'][key] = result
+            while len(entry['memo']) > MAX_MEMO_PER_VERSION:
+                entry['memo'].popitem(last=False)
+    return result
+
+def clear_frames(ticker=None):
+    """Drop registered frames for one ticker, or all of them."""
+    with _lock:
+        for key in [k for k in _frames if ticker is None or k[0] == ticker]:
+            del _frames[key]
+
+def get_memory_report():
+    """Return rows, bytes and per-column usage for every registered frame, largest first."""
+    with _lock:
+        entries = [(key, entry['raw'], entry['weekly']) for key, entry in _frames.items()]
+    report = []
+    for (ticker, version), raw_df, weekly_df in entries:
+        for name, df in (('raw', raw_df), ('weekly', weekly_df)):
+            report.append({
+                'ticker': ticker,
+                'version': version,
+                'frame': name,
+                'rows': len(df),
+                'bytes': frame_nbytes(df),
+            })
+    return sorted(report, key=lambda row: row['bytes'], reverse=True)
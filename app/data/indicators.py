@@ -0,0 +1,158 @@
+"""Rolling price indicators (moving averages, MA ratios, running max) computed in one pass and cached per data version."""
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from utils.rolling import rolling_mean, cumulative_sums, window_means
+
+DEFAULT_MA_WINDOWS = (30, 60, 90, 120, 150, 180)
+# Price column of the analysis frames (high_index_df.csv); the dashboard's frames use market_close_price
+DEFAULT_PRICE_COLUMN = 'daily_avg_price'
+
+# Indicator sets kept across tickers, window sets and data versions, LRU-evicted
+MAX_INDICATOR_ENTRIES = 16
+
+_indicators = OrderedDict()
+_lock = threading.Lock()
+
+def _normalize_windows(windows):
+    return tuple(sorted({int(w) for w in windows}))
+
+def _digest(dates, prices):
+    """Content hash of a (dates, prices) history, like compute_data_version over just these two columns."""
+    row_hashes = pd.util.hash_array(np.asarray(dates)) * np.uint64(31) + pd.util.hash_array(prices)
+    return f"{len(prices)}-{int(row_hashes.sum()):016x}"
+
+def _source_arrays(df, price_col):
+    """Date-sorted (dates, prices) arrays of a frame."""
+    if not df['date'].is_monotonic_increasing:
+        df = df.sort_values('date')
+    return df['date'].to_numpy(), df[price_col].to_numpy(dtype=float)
+
+def _indicator_columns(state, windows, rows):
+    """Indicator values for positions `rows` of a state, keyed by output column."""
+    price = state['prices'][rows]
+    columns = {}
+    means = {w: window_means(state['csum'], state['counts'], w, rows) for w in windows}
+    for w in windows:
+        columns[f'MA_{w}'] = means[w]
+    for w in windows:
+        columns[f'MA{w}_ratio'] = means[w] / price - 1
+    columns['current_max_price'] = state['running_max'][rows]
+    columns['price_ratio'] = price / state['running_max'][rows] - 1
+    return columns
+
+def _with_frame(state, columns):
+    """Attach indicator columns and a frame over them (the frame shares the arrays, no copy)."""
+    state['columns'] = columns
+    state['frame'] = pd.DataFrame({'date': state['dates'], **columns}, copy=False)
+    return state
+
+def _build_state(dates, prices, windows):
+    """Cumulative sums, running max and indicator columns for a whole history."""
+    csum, counts = cumulative_sums(prices)
+    state = {
+        'dates': dates,
+        'prices': prices,
+        'csum': csum,
+        'counts': counts,
+        'running_max': np.fmax.accumulate(prices) if len(prices) else prices,
+    }
+    return _with_frame(state, _indicator_columns(state, windows, np.arange(len(prices))))
+
+def _is_prefix(state, dates, prices):
+    """True when the state's history is an unchanged prefix of (dates, prices).
+
+    Compares the last stored day first and then the digest of the leading
+    rows, so a mismatch is usually rejected without hashing anything.
+    """
+    n = len(state['prices'])
+    if n == 0 or n > len(prices):
+        return n == 0
+    if dates[n - 1] != state['dates'][-1]:
+        return False
+    if not (prices[n - 1] == state['prices'][-1] or np.isnan(prices[n - 1]) and np.isnan(state['prices'][-1])):
+        return False
+    return _digest(dates[:n], prices[:n]) == state['digest']
+
+def _extend_state(state, dates, prices, windows):
+    """Append indicator rows for days after the state's last day.
+
+    The cumulative sums and running max continue from their stored last
+    values, so only the new days are summed and the result is identical to a
+    full recompute over the longer history.
+    """
+    n = len(state['prices'])
+    if n == 0:
+        return _build_state(dates, prices, windows)
+    if n == len(prices):
+        return state
+    new_prices = prices[n:]
+    new_csum, new_counts = cumulative_sums(new_prices, state['csum'][-1], state['counts'][-1])
+    extended = {
+        'dates': dates,
+        'prices': prices,
+        'csum': np.concatenate([state['csum'], new_csum[1:]]),
+        'counts': np.concatenate([state['counts'], new_counts[1:]]),
+        'running_max': np.concatenate([
+            state['running_max'],
+            np.fmax.accumulate(np.r_[state['running_max'][-1], new_prices])[1:]
+        ]),
+    }
+    tail = _indicator_columns(extended, windows, np.arange(n, len(prices)))
+    return _with_frame(extended, {
+        name: np.concatenate([state['columns'][name], values]) for name, values in tail.items()
+    })
+
+def compute_indicators(df, windows=DEFAULT_MA_WINDOWS, price_col=DEFAULT_PRICE_COLUMN):
+    """Return one row per day with MA_{w}, MA{w}_ratio, current_max_price and price_ratio.
+
+    All windows come from a single cumulative sum of the price column, so the
+    cost is O(rows) per window rather than O(rows * window); a NaN price only
+    blanks the moving averages whose window covers it. Ratios follow
+    the analysis data (high_index_df.csv): MA / price - 1 and price / running max - 1,
+    over daily_avg_price by default as in that file.
+    """
+    dates, prices = _source_arrays(df, price_col)
+    return _build_state(dates, prices, _normalize_windows(windows))['frame']
+
+def get_indicators(ticker, df, windows=DEFAULT_MA_WINDOWS, price_col=DEFAULT_PRICE_COLUMN, version=None):
+    """Return compute_indicators(df) for a ticker, cached per (ticker, data version, window set).
+
+    When df is an earlier cached history of the same ticker plus new days,
+    only the new days are computed. Without a version the cache is keyed by
+    a digest of the date and price columns only. Returned frames are shared:
+    callers must not mutate them.
+    """
+    windows = _normalize_windows(windows)
+    dates, prices = _source_arrays(df, price_col)
+    digest = _digest(dates, prices) if version is None else None
+    key = (ticker, version or digest, windows, price_col)
+
+    with _lock:
+        state = _indicators.get(key)
+        if state is not None:
+            _indicators.move_to_end(key)
+            return state['frame']
+        previous = [entry for entry_key, entry in reversed(_indicators.items())
+                    if entry_key[0] == ticker and entry_key[2:] == (windows, price_col)]
+
+    base = next((entry for entry in previous if _is_prefix(entry, dates, prices)), None)
+    if base is None:
+        state = _build_state(dates, prices, windows)
+    else:
+        state = _extend_state(base, dates, prices, windows)
+    state['digest'] = digest or _digest(dates, prices)
+
+    with _lock:
+        _indicators[key] = state
+        _indicators.move_to_end(key)
+        while len(_indicators) > MAX_INDICATOR_ENTRIES:
+            _indicators.popitem(last=False)
+    return state['frame']
+
+def clear_indicators(ticker=None):
+    """Drop cached indicators for one ticker, or all of them."""
+    with _lock:
+        for key in [k for k in _indicators if ticker is None or k[0] == ticker]:
+            del _indicators[key]
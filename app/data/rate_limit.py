@@ -0,0 +1,42 @@
+"""Thread-safe token-bucket rate limiters shared per data source."""
+import os
+import threading
+import time
+
+class TokenBucket:
+    """Allow `rate` calls per second on average with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` are available, then consume them. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+# One bucket per upstream API, shared by every worker thread in the process
+RATE_LIMITERS = {
+    'yahoo': TokenBucket(rate=float(os.environ.get('YAHOO_RATE_PER_SEC', 1.0)), capacity=3),
+    'coinapi': TokenBucket(rate=float(os.environ.get('COINAPI_RATE_PER_SEC', 0.5)), capacity=2),
+}
+
+def wait_for_slot(source):
+    """Block until the named source's limiter allows another request."""
+    return RATE_LIMITERS[source].acquire()
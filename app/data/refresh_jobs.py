@@ -0,0 +1,209 @@
+"""Background refresh jobs so network fetches and DB writes never block a Dash callback.
+
+Job state is mirrored to JSON files in the disk cache directory, so every
+worker process of a deployment sees the same jobs: a poll that lands on a
+worker other than the one running the job still gets its progress, and a
+per-ticker claim file deduplicates refreshes across processes.
+"""
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from data import disk_cache
+from data.data_loader import clear_cache
+from data.data_updater import update_btc_data, update_stock_data
+
+# Finished jobs kept around so late polls can still read their result
+MAX_FINISHED_JOBS = 50
+
+# A queued/running job with no update for this long is assumed dead (its worker exited)
+JOB_STALE_SECONDS = int(os.environ.get('REFRESH_JOB_STALE_SECONDS', 15 * 60))
+
+# Finished job files older than this are deleted
+JOB_FILE_TTL_SECONDS = 24 * 3600
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='refresh')
+_jobs = {}
+_lock = threading.Lock()
+
+def _jobs_dir():
+    path = os.path.join(disk_cache.CACHE_DIR, 'jobs')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def _job_path(job_id):
+    return os.path.join(_jobs_dir(), f"{job_id}.json")
+
+def _claim_path(ticker):
+    return os.path.join(_jobs_dir(), f"active_{re.sub(r'[^A-Za-z0-9_-]', '_', ticker)}")
+
+def _write_job(job):
+    """Atomically replace a job's shared state file."""
+    path = _job_path(job['id'])
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(job, f, default=str)
+    os.replace(tmp_path, path)
+
+def _read_job(job_id):
+    try:
+        with open(_job_path(job_id)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _is_live(job):
+    """True while a job is queued/running and has reported within JOB_STALE_SECONDS."""
+    if job is None:
+        return False  # State is written before claiming, so a claim without it is left over
+    return job['status'] in ('queued', 'running') and time.time() - job['updated_at'] < JOB_STALE_SECONDS
+
+def _update_job(job_id, **fields):
+    with _lock:
+        job = _jobs[job_id]
+        job.update(fields, updated_at=time.time())
+        snapshot = dict(job)
+    _write_job(snapshot)
+
+def _prune_finished():
+    """Drop the oldest finished jobs beyond MAX_FINISHED_JOBS and expired job files."""
+    with _lock:
+        finished = [job_id for job_id, job in _jobs.items() if job['status'] in ('finished', 'failed')]
+        for job_id in finished[:-MAX_FINISHED_JOBS]:
+            del _jobs[job_id]
+    cutoff = time.time() - JOB_FILE_TTL_SECONDS
+    for entry in os.scandir(_jobs_dir()):
+        if entry.name.endswith('.json') and entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+def _release_claim(ticker, job_id):
+    """Remove the ticker's claim file if it still belongs to job_id.
+
+    The claim is first renamed aside (atomic), so the ownership check reads
+    exactly the file being removed; a claim made by another job meanwhile is
+    never deleted, only put back.
+    """
+    path = _claim_path(ticker)
+    released = f"{path}.{uuid.uuid4().hex}.released"
+    try:
+        os.rename(path, released)
+    except OSError:
+        return  # Already released
+    try:
+        with open(released) as f:
+            holder = f.read().strip()
+        if holder != job_id:
+            try:
+                os.link(released, path)  # Restore, unless a new claim took the slot meanwhile
+            except OSError:
+                pass
+    finally:
+        os.remove(released)
+
+def invalidate_ticker(ticker):
+    """Drop this process's cached frames for a ticker so the next load reads the refreshed rows."""
+    clear_cache('btc' if ticker == 'BTC' else 'stock', ticker)
+    clear_cache('fear_greed')
+    clear_cache('rollup')
+
+def _run_refresh(job_id, ticker):
+    """Run one refresh in a worker thread and record progress/result on the job.
+
+    The final status is written last, after the claim is released and old
+    jobs are pruned, so a job reported finished has no work left.
+    """
+    _update_job(job_id, status='running', started_at=time.time())
+
+    def progress(percent, message):
+        _update_job(job_id, progress=percent, message=message)
+
+    outcome = {'status': 'failed', 'message': f"Refresh for {ticker} did not complete"}
+    try:
+        if ticker == 'BTC':
+            result = update_btc_data(progress=progress)
+        else:
+            result = update_stock_data(ticker, progress=progress)
+        # Next load picks up the new rows as a new data version
+        invalidate_ticker(ticker)
+        outcome = {'status': 'finished', 'progress': 100, 'message': result['message'], 'result': result}
+    except Exception as e:
+        print(f"Refresh job for {ticker} failed: {e}")
+        outcome = {'status': 'failed', 'message': f"Error: {str(e)}"}
+    finally:
+        _release_claim(ticker, job_id)
+        _prune_finished()
+        _update_job(job_id, finished_at=time.time(), **outcome)
+
+def _claim(ticker, job_id):
+    """Claim the ticker for job_id, or return the id of the live job already holding it.
+
+    The claim file is written aside and hard-linked into place (atomic, fails
+    if a claim exists), so a claim is never seen without its job id.
+    """
+    path = _claim_path(ticker)
+    pending = f"{path}.{job_id}.pending"
+    with open(pending, 'w') as f:
+        f.write(job_id)
+    try:
+        for _ in range(3):
+            try:
+                os.link(pending, path)
+                return job_id
+            except FileExistsError:
+                pass
+            try:
+                with open(path) as f:
+                    holder = f.read().strip()
+            except OSError:
+                continue  # Released meanwhile; try again
+            if _is_live(get_job(holder)):
+                return holder
+            _release_claim(ticker, holder)  # Stale claim from a dead or finished job
+    finally:
+        os.remove(pending)
+    raise RuntimeError(f"Could not claim a refresh for {ticker}")
+
+def submit_refresh(ticker):
+    """Start a background refresh for a ticker, or return the job already running for it in any worker."""
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    job = {
+        'id': job_id,
+        'ticker': ticker,
+        'status': 'queued',
+        'progress': 0,
+        'message': f"Refresh queued for {ticker}",
+        'result': None,
+        'submitted_at': now,
+        'updated_at': now,
+        'worker_pid': os.getpid(),
+    }
+    _write_job(job)
+    holder = _claim(ticker, job_id)
+    if holder != job_id:
+        os.remove(_job_path(job_id))
+        return holder
+    with _lock:
+        _jobs[job_id] = job
+    _executor.submit(_run_refresh, job_id, ticker)
+    return job_id
+
+def get_job(job_id):
+    """Return a snapshot of a job's state from this process or the shared job files, or None if unknown.
+
+    A job owned by another worker that stopped reporting is returned as failed.
+    """
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is not None:
+            return dict(job)
+    job = _read_job(job_id)
+    if job is not None and job['status'] in ('queued', 'running') and not _is_live(job):
+        job.update(status='failed', message=f"Refresh for {job['ticker']} stopped responding")
+    return job
@@ -0,0 +1,120 @@
+"""Materialized weekly_stats / monthly_stats tables per ticker, kept next to the daily price tables."""
+import pandas as pd
+from sqlalchemy import text, inspect
+from data.db import get_engine
+from data.data_processor import calculate_weekly_stats, calculate_monthly_stats, merge_fear_greed
+
+# kind -> (table, period start column)
+ROLLUP_TABLES = {
+    'weekly': ('weekly_stats', 'week_start'),
+    'monthly': ('monthly_stats', 'month_start'),
+}
+
+def _week_floor(ts):
+    """Monday of the ISO week containing ts."""
+    ts = pd.Timestamp(ts).normalize()
+    return ts - pd.Timedelta(days=ts.weekday())
+
+def _month_floor(ts):
+    """First day of the month containing ts."""
+    return pd.Timestamp(ts).normalize().replace(day=1)
+
+def _daily_query(ticker):
+    """Daily OHLC query for a ticker with columns named as in the merged app frame."""
+    if ticker == 'BTC':
+        return text("""
+            SELECT date, market_open_price, market_close_price, daily_high, daily_low
+            FROM bitcoin_prices_daily
+            WHERE date >= :since
+            ORDER BY date
+        """)
+    return text("""
+        SELECT date, open_price AS market_open_price, close_price AS market_close_price,
+               high_price AS daily_high, low_price AS daily_low
+        FROM stock_prices_daily
+        WHERE ticker = :ticker AND date >= :since
+        ORDER BY date
+    """)
+
+def _rebuild_from(conn, kind, ticker, since, floor):
+    """Start of the first period to rebuild, or None to rebuild everything.
+
+    Always includes the last stored period, which may have been partial.
+    """
+    table_name, start_col = ROLLUP_TABLES[kind]
+    if not inspect(conn).has_table(table_name):
+        return None
+    last = conn.execute(
+        text(f"SELECT MAX({start_col}) FROM {table_name} WHERE ticker = :ticker"),
+        {"ticker": ticker}
+    ).scalar()
+    if last is None:
+        return None
+    anchor = pd.Timestamp(last)
+    if since is not None:
+        anchor = min(anchor, pd.Timestamp(since))
+    return floor(anchor)
+
+def _ensure_table(conn, kind, rows):
+    """Create a rollup table keyed by (ticker, period start), or add that key to an existing one."""
+    table_name, start_col = ROLLUP_TABLES[kind]
+    if not inspect(conn).has_table(table_name):
+        conn.execute(text(pd.io.sql.get_schema(rows, table_name, keys=['ticker', start_col], con=conn)))
+    else:
+        conn.execute(text(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {table_name}_ticker_{start_col}_key "
+            f"ON {table_name} (ticker, {start_col})"
+        ))
+
+def _replace_rows(conn, kind, ticker, start, rows):
+    """Delete a ticker's rollup rows from start on (all when start is None) and insert the new ones."""
+    table_name, start_col = ROLLUP_TABLES[kind]
+    if inspect(conn).has_table(table_name):
+        condition = f" AND {start_col} >= :start" if start is not None else ""
+        params = {"ticker": ticker}
+        if start is not None:
+            params["start"] = start.to_pydatetime()
+        conn.execute(text(f"DELETE FROM {table_name} WHERE ticker = :ticker{condition}"), params)
+    if rows.empty:
+        return
+    rows = rows.copy()
+    rows.insert(0, 'ticker', ticker)
+    rows['updated_at'] = pd.Timestamp.now()
+    _ensure_table(conn, kind, rows)
+    rows.to_sql(table_name, conn, if_exists='append', index=False)
+
+def refresh_rollups(ticker, fg_history, db_params, since=None):
+    """Rebuild the weekly and monthly rollup rows touched by daily rows dated `since` or later.
+
+    Only the periods from the last stored one (or `since`, if earlier) are
+    recomputed; a ticker without rollup rows is rebuilt in full. Daily prices
+    are joined to `fg_history` like the dashboard's merged frame, so rows match
+    calculate_weekly_stats on the app side. Tables are keyed by (ticker,
+    period start), and refreshes of one ticker are serialized on PostgreSQL.
+    Returns rows written per table.
+    """
+    engine = get_engine(db_params)
+    with engine.begin() as conn:
+        if conn.dialect.name == 'postgresql':
+            # Held until commit, so concurrent refreshes of a ticker run one after another
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": f"rollups:{ticker}"})
+        week_from = _rebuild_from(conn, 'weekly', ticker, since, _week_floor)
+        month_from = _rebuild_from(conn, 'monthly', ticker, since, _month_floor)
+        fetch_from = None if week_from is None or month_from is None else min(week_from, month_from)
+
+        daily = pd.read_sql(_daily_query(ticker), conn, params={
+            "ticker": ticker,
+            "since": (fetch_from if fetch_from is not None else pd.Timestamp('1970-01-01')).date()
+        })
+        daily = merge_fear_greed(daily, fg_history[['date', 'value']])
+
+        weekly = calculate_weekly_stats(daily)
+        if week_from is not None and not weekly.empty:
+            weekly = weekly[weekly['week_start'] >= week_from]
+        monthly = calculate_monthly_stats(daily)
+        if month_from is not None and not monthly.empty:
+            monthly = monthly[monthly['month_start'] >= month_from]
+
+        _replace_rows(conn, 'weekly', ticker, week_from, weekly)
+        _replace_rows(conn, 'monthly', ticker, month_from, monthly)
+    return {'weekly': len(weekly), 'monthly': len(monthly)}
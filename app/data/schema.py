@@ -0,0 +1,56 @@
+"""Compact dtype schema applied to loaded frames, plus per-frame memory reports."""
+import os
+import pandas as pd
+from data.market_sentiment import FG_EMOJI
+
+# Alternative.me classifications, least to most greedy
+FG_CLASSIFICATION_DTYPE = pd.CategoricalDtype(list(FG_EMOJI), ordered=True)
+
+# float32 halves price memory; float64 keeps exact parity with database values
+PRICE_DTYPE = os.environ.get('FRAME_PRICE_DTYPE', 'float64')
+
+DATE_DTYPE = 'datetime64[ns]'
+
+PRICE_COLUMNS = [
+    'market_open_price', 'market_close_price', 'daily_high', 'daily_low', 'avg_price',
+    'open_price', 'close_price', 'high_price', 'low_price', 'daily_change',
+]
+
+# Non-price columns with a fixed compact dtype
+FRAME_SCHEMA = {
+    'value': 'uint8',
+    'value_classification': FG_CLASSIFICATION_DTYPE,
+    'year': 'int16',
+    'market_sentiment': 'category',
+}
+
+def apply_schema(df, price_dtype=None):
+    """Return df with known columns cast to compact dtypes; other columns are left alone.
+
+    Dates become datetime64 days, F&G values uint8 and classifications
+    categorical. Columns with missing values keep a nullable-safe dtype.
+    """
+    if price_dtype is None:
+        price_dtype = PRICE_DTYPE
+
+    casts = {col: price_dtype for col in PRICE_COLUMNS if col in df.columns}
+    for col, dtype in FRAME_SCHEMA.items():
+        if col not in df.columns:
+            continue
+        if dtype == 'uint8' and df[col].isna().any():
+            dtype = 'float32'
+        if dtype is FG_CLASSIFICATION_DTYPE and not set(df[col].dropna().unique()) <= set(dtype.categories):
+            dtype = 'category'
+        casts[col] = dtype
+
+    df = df.astype(casts)
+    if 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date']).dt.normalize().astype(DATE_DTYPE)
+    return df
+
+def frame_memory_report(df):
+    """Per-column dtype and deep memory usage in bytes, largest first."""
+    usage = df.memory_usage(index=True, deep=True)
+    dtypes = df.dtypes.astype(str).reindex(usage.index).fillna('index')
+    report = pd.DataFrame({'dtype': dtypes, 'bytes': usage.astype('int64')})
+    return report.sort_values('bytes', ascending=False)
@@ -0,0 +1,89 @@
+"""Persisted weekly stats per ticker, maintained incrementally as new daily rows arrive."""
+import os
+import pandas as pd
+from data.data_processor import calculate_weekly_stats
+from data.disk_cache import read_cached, write_cached
+
+WEEKLY_DATASET = 'weekly_stats'
+
+# Compare every incremental update against a full recompute (slow; for debugging)
+VERIFY_WEEKLY_STATS = os.environ.get('WEEKLY_STATS_VERIFY', '0') == '1'
+
+def _iso_monday(ts):
+    """Midnight of the Monday starting the ISO week that contains ts."""
+    ts = pd.Timestamp(ts).normalize()
+    return ts - pd.Timedelta(days=ts.weekday())
+
+def _rows_since(daily_df, start):
+    """Daily rows dated on or after start; daily_df must be sorted by date."""
+    dates = daily_df['date']
+    key = start if pd.api.types.is_datetime64_any_dtype(dates) else start.date()
+    return daily_df.iloc[dates.searchsorted(key, side='left'):]
+
+def _rows_before(daily_df, end):
+    """Daily rows dated before end; daily_df must be sorted by date."""
+    dates = daily_df['date']
+    key = end if pd.api.types.is_datetime64_any_dtype(dates) else end.date()
+    return daily_df.iloc[:dates.searchsorted(key, side='left')]
+
+def splice_weekly_stats(weekly_df, daily_df):
+    """Recompute the first and latest ISO weeks of daily_df and splice them around the stored weeks.
+
+    Only daily rows of daily_df's first week and of the weeks from the last
+    stored week's Monday onward are touched, so a daily refresh costs
+    O(days in those weeks) instead of O(all history), also when a trailing
+    history window moved its start forward. Stored weeks before daily_df's
+    first ISO week are dropped. daily_df must not start before the stored weeks.
+    """
+    start = _iso_monday(weekly_df['week_end'].max())
+    head_end = min(_iso_monday(daily_df['date'].iloc[0]) + pd.Timedelta(days=7), start)
+    head = calculate_weekly_stats(_rows_before(daily_df, head_end))
+    middle = weekly_df[(weekly_df['week_start'] >= head_end) & (weekly_df['week_start'] < start)]
+    tail = calculate_weekly_stats(_rows_since(daily_df, start))
+    parts = [part for part in (head, middle, tail) if not part.empty]
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat([part[weekly_df.columns] for part in parts], ignore_index=True)
+
+def weekly_stats_consistent(daily_df, weekly_df):
+    """Check a weekly table against a full calculate_weekly_stats recompute."""
+    full = calculate_weekly_stats(daily_df)
+    if full.empty or weekly_df.empty:
+        return full.empty and weekly_df.empty
+    try:
+        pd.testing.assert_frame_equal(
+            weekly_df.reset_index(drop=True), full, check_dtype=False, check_exact=False
+        )
+    except AssertionError:
+        return False
+    return True
+
+def update_weekly_stats(ticker, daily_df, verify=None):
+    """Return weekly stats for a ticker, recomputing only weeks touched since the last update.
+
+    A daily history whose start moved later (a trailing window such as the
+    F&G history limit) only recomputes its new first week. Falls back to a
+    full recompute when nothing is stored yet or when the daily history
+    starts before the stored weeks (a backfill).
+    """
+    if verify is None:
+        verify = VERIFY_WEEKLY_STATS
+    if daily_df.empty:
+        return pd.DataFrame()
+
+    stored = read_cached(WEEKLY_DATASET, ticker, date_col='week_start')
+    if stored is None or stored.empty or pd.Timestamp(daily_df['date'].iloc[0]) < stored['week_start'].min():
+        weekly = calculate_weekly_stats(daily_df)
+    else:
+        weekly = splice_weekly_stats(stored, daily_df)
+
+    if verify and not weekly_stats_consistent(daily_df, weekly):
+        print(f"Incremental weekly stats for {ticker} diverged from a full recompute; rebuilding")
+        weekly = calculate_weekly_stats(daily_df)
+
+    if not weekly.empty and (stored is None or not weekly.equals(stored)):
+        try:
+            write_cached(WEEKLY_DATASET, weekly, key=ticker)
+        except Exception as e:
+            print(f"Could not persist weekly stats for {ticker}: {str(e)}")
+    return weekly
@@ -0,0 +1,37 @@
+"""FrameCache isolation, eviction and targeted invalidation."""
+import pandas as pd
+from data.cache import FrameCache, frame_nbytes
+
+
+def test_callers_cannot_modify_cached_frames():
+    cache = FrameCache()
+    df = pd.DataFrame({'price': [1.0, 2.0]})
+    cache.set('btc', 'BTC', df)
+    df.loc[0, 'price'] = 99.0
+
+    hit = cache.get('btc', 'BTC')
+    assert hit['price'].tolist() == [1.0, 2.0]
+    hit.loc[1, 'price'] = 99.0
+    assert cache.get('btc', 'BTC')['price'].tolist() == [1.0, 2.0]
+
+
+def test_lru_eviction_stays_under_max_bytes():
+    df = pd.DataFrame({'price': range(1000)}, dtype=float)
+    cache = FrameCache(max_bytes=2 * frame_nbytes(df))
+    for key in ['A', 'B', 'C']:
+        cache.set('stock', key, df)
+    assert cache.get('stock', 'A') is None
+    assert cache.get('stock', 'C') is not None
+    assert cache.stats()['namespaces']['stock']['evictions'] == 1
+
+
+def test_invalidate_drops_ranged_entries_of_a_key():
+    cache = FrameCache()
+    df = pd.DataFrame({'price': [1.0]})
+    cache.set('stock', 'TSLA', df)
+    cache.set('stock', ('TSLA', '2024-01-01', None, None), df)
+    cache.set('stock', 'HOOD', df)
+    cache.invalidate('stock', 'TSLA')
+    assert cache.get('stock', 'TSLA') is None
+    assert cache.get('stock', ('TSLA', '2024-01-01', None, None)) is None
+    assert cache.get('stock', 'HOOD') is not None
@@ -0,0 +1,48 @@
+"""Local Fear & Greed history: tail pulls and backfills when a caller needs more than is stored."""
+from datetime import date
+import pandas as pd
+import pytest
+import data.data_loader as data_loader
+import data.disk_cache as disk_cache
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    """Fake alternative.me API over the full index history; records the requested limits."""
+    history = pd.DataFrame({
+        'date': pd.date_range(data_loader.FG_HISTORY_START, date.today()),
+        'value_classification': 'Neutral',
+        'value': 50,
+    })
+    limits = []
+
+    def fetch(limit):
+        limits.append(limit)
+        return history.tail(limit).reset_index(drop=True)
+
+    monkeypatch.setattr(disk_cache, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(data_loader, 'fetch_fear_greed', fetch)
+    data_loader.clear_cache('fear_greed')
+    yield limits
+    data_loader.clear_cache('fear_greed')
+
+
+def test_short_store_is_backfilled_to_limit(api):
+    assert len(data_loader.load_fear_greed_data(limit=30)) == 30
+    assert len(data_loader.load_fear_greed_data()) == 2200
+    assert api == [30, 2200]
+
+
+def test_since_before_store_start_is_backfilled(api):
+    data_loader.load_fear_greed_data(limit=30)
+    since = pd.Timestamp(date.today()) - pd.Timedelta(days=400)
+    df = data_loader.load_fear_greed_data(since=since)
+    assert df['date'].min() == since
+    assert len(df) == 401
+
+
+def test_complete_store_only_pulls_the_tail(api):
+    data_loader.load_fear_greed_data(since='2010-01-01')
+    data_loader.clear_cache('fear_greed')
+    data_loader.load_fear_greed_data(limit=10000)
+    assert len(api) == 1  # Full history from the index start is not refetched
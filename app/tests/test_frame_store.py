@@ -0,0 +1,88 @@
+"""Switching tickers in the dashboard reuses registered frames and their memoized figures."""
+import numpy as np
+import pandas as pd
+import pytest
+import app
+from data import disk_cache, frame_store
+
+
+def make_raw(ticker, seed):
+    """Sorted daily rows shaped like load_all_data's merged price/F&G frame."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2022-01-01', '2023-12-31')
+    price = 100 * np.cumprod(1 + rng.normal(0, 0.02, len(dates)))
+    return pd.DataFrame({
+        'date': dates,
+        'market_open_price': price,
+        'market_close_price': price * (1 + rng.normal(0, 0.01, len(dates))),
+        'daily_high': price * 1.03,
+        'daily_low': price * 0.97,
+        'value': rng.integers(0, 100, len(dates)),
+        'value_classification': 'Neutral',
+    })
+
+
+@pytest.fixture
+def dashboard(tmp_path, monkeypatch):
+    """app with synthetic per-ticker data and a counting heatmap builder."""
+    monkeypatch.setattr(disk_cache, 'CACHE_DIR', str(tmp_path))
+    frames = {'BTC': make_raw('BTC', 0), 'TSLA': make_raw('TSLA', 1)}
+    monkeypatch.setattr(app, 'load_all_data', lambda ticker: frames[ticker].copy())
+    calls = {'heatmap': 0}
+    build_heatmap = app.create_bucket_heatmap
+
+    def counting_heatmap(*args, **kwargs):
+        calls['heatmap'] += 1
+        return build_heatmap(*args, **kwargs)
+
+    monkeypatch.setattr(app, 'create_bucket_heatmap', counting_heatmap)
+    frame_store.clear_frames()
+    yield calls
+    frame_store.clear_frames()
+
+
+def show_heatmap(ticker):
+    handle = app.build_frames(ticker)
+    return handle, app.update_bucket_heatmap(handle, [2022, 2023], 'weekly', ticker)
+
+
+def test_toggling_tickers_reuses_the_memoized_figure(dashboard):
+    first_handle, first_figure = show_heatmap('BTC')
+    show_heatmap('TSLA')
+    handle, figure = show_heatmap('BTC')
+    assert handle == first_handle
+    assert figure is first_figure
+    assert dashboard['heatmap'] == 2  # Once for BTC, once for TSLA
+
+
+def test_new_data_version_gets_a_fresh_memo(dashboard):
+    raw_df = make_raw('BTC', 0)
+    handle = frame_store.store_frames('BTC', raw_df, pd.DataFrame())
+    assert frame_store.memoize(handle, 'figure', lambda: 'old') == 'old'
+    assert frame_store.store_frames('BTC', raw_df, pd.DataFrame()) == handle
+    assert frame_store.memoize(handle, 'figure', lambda: 'rebuilt') == 'old'
+
+    changed = raw_df.assign(market_close_price=raw_df['market_close_price'] * 2)
+    new_handle = frame_store.store_frames('BTC', changed, pd.DataFrame())
+    assert new_handle != handle
+    assert frame_store.memoize(new_handle, 'figure', lambda: 'new') == 'new'
+
+
+def test_weekly_stats_and_indexes_are_built_once_per_version(dashboard, monkeypatch):
+    builds = {'weekly': 0, 'index': 0}
+    update_weekly_stats, build_bucket_index = app.update_weekly_stats, app.build_bucket_index
+
+    def counting_weekly(*args):
+        builds['weekly'] += 1
+        return update_weekly_stats(*args)
+
+    def counting_index(*args):
+        builds['index'] += 1
+        return build_bucket_index(*args)
+
+    monkeypatch.setattr(app, 'update_weekly_stats', counting_weekly)
+    monkeypatch.setattr(app, 'build_bucket_index', counting_index)
+    handle = app.build_frames('BTC')
+    app.build_frames('TSLA')
+    assert app.build_frames('BTC') == handle
+    assert builds == {'weekly': 2, 'index': 4}
@@ -0,0 +1,88 @@
+"""Rolling indicator engine against pandas rolling/cummax, NaN prices and the incremental cache path."""
+import os
+import subprocess
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from data.indicators import DEFAULT_MA_WINDOWS, clear_indicators, compute_indicators, get_indicators, rolling_mean
+
+ANALYSIS_CSV = os.path.join(os.path.dirname(__file__), '..', '..', 'data analysis', 'high_index_df.csv')
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_indicators()
+    yield
+    clear_indicators()
+
+
+def price_frame(n=400, nan_rows=(), seed=0):
+    rng = np.random.default_rng(seed)
+    price = 100 * np.cumprod(1 + rng.normal(0, 0.03, n))
+    price[list(nan_rows)] = np.nan
+    return pd.DataFrame({'date': pd.date_range('2020-01-01', periods=n), 'daily_avg_price': price})
+
+
+def pandas_reference(df):
+    price = df['daily_avg_price']
+    out = pd.DataFrame({'date': df['date']})
+    for w in DEFAULT_MA_WINDOWS:
+        out[f'MA_{w}'] = price.rolling(window=w).mean()
+    for w in DEFAULT_MA_WINDOWS:
+        out[f'MA{w}_ratio'] = out[f'MA_{w}'] / price - 1
+    return out
+
+
+@pytest.mark.parametrize('nan_rows', [(), (100,), (0, 57, 58, 399)])
+def test_moving_averages_match_pandas_rolling(nan_rows):
+    df = price_frame(nan_rows=nan_rows)
+    result = compute_indicators(df)
+    expected = pandas_reference(df)
+    for col in expected.columns[1:]:
+        np.testing.assert_allclose(result[col], expected[col], rtol=1e-9, equal_nan=True, err_msg=col)
+
+
+def test_nan_price_only_blanks_windows_covering_it():
+    ma = rolling_mean(price_frame(nan_rows=(100,))['daily_avg_price'], 30)
+    assert np.isnan(ma).sum() == 29 + 30
+    assert np.isnan(ma[100:130]).all()
+    assert np.isfinite(ma[130:]).all()
+
+
+def test_extension_matches_full_recompute():
+    df = price_frame(n=500, nan_rows=(450,))
+    get_indicators('TEST', df.iloc[:300])
+    get_indicators('TEST', df.iloc[:460])
+    extended = get_indicators('TEST', df)
+    clear_indicators()
+    pd.testing.assert_frame_equal(extended, compute_indicators(df))
+
+
+def test_changed_history_is_recomputed_not_extended():
+    df = price_frame(n=300)
+    get_indicators('TEST', df.iloc[:200])
+    revised = df.copy()
+    revised.loc[50, 'daily_avg_price'] *= 2
+    pd.testing.assert_frame_equal(get_indicators('TEST', revised), compute_indicators(revised))
+
+
+def test_ratios_follow_the_analysis_csv_definitions():
+    csv = pd.read_csv(ANALYSIS_CSV)
+    for w in DEFAULT_MA_WINDOWS:
+        np.testing.assert_allclose(csv[f'MA{w}_ratio'], csv[f'MA_{w}'] / csv['daily_avg_price'] - 1, atol=1e-6)
+    np.testing.assert_allclose(csv['price_ratio'], csv['daily_avg_price'] / csv['current_max_price'] - 1, atol=1e-6)
+
+    df = price_frame()
+    result = compute_indicators(df)
+    price = df['daily_avg_price']
+    for w in DEFAULT_MA_WINDOWS:
+        np.testing.assert_allclose(result[f'MA{w}_ratio'], result[f'MA_{w}'] / price - 1)
+    np.testing.assert_allclose(result['current_max_price'], price.cummax())
+    np.testing.assert_allclose(result['price_ratio'], price / price.cummax() - 1)
+
+
+def test_analysis_scripts_do_not_load_the_data_package():
+    analysis_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'data analysis')
+    code = "import sys, strategy_sweep; sys.exit('data' in sys.modules or 'sqlalchemy' in sys.modules)"
+    assert subprocess.run([sys.executable, '-c', code], cwd=analysis_dir).returncode == 0
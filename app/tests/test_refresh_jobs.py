@@ -0,0 +1,104 @@
+"""Refresh jobs shared across worker processes through the job files in the disk cache."""
+import os
+import subprocess
+import sys
+import threading
+import time
+import pytest
+from data import disk_cache, refresh_jobs
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def jobs(tmp_path, monkeypatch):
+    """Isolated job directory and a stock update that blocks until released."""
+    release = threading.Event()
+
+    def update_stock_data(ticker, progress=None):
+        progress(50, f"Fetching {ticker}")
+        release.wait(10)
+        return {'status': 'success', 'message': f"{ticker} updated", 'new_records': 1}
+
+    monkeypatch.setattr(disk_cache, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(refresh_jobs, 'update_stock_data', update_stock_data)
+    refresh_jobs._jobs.clear()
+    yield release
+    release.set()
+    for job_id in list(refresh_jobs._jobs):
+        wait_for(job_id, ('finished', 'failed'))
+
+
+def wait_for(job_id, statuses, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = refresh_jobs.get_job(job_id)
+        if job is not None and job['status'] in statuses:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Job {job_id} never reached {statuses}")
+
+
+def test_same_ticker_is_deduplicated(jobs):
+    job_id = refresh_jobs.submit_refresh('TSLA')
+    assert refresh_jobs.submit_refresh('TSLA') == job_id
+    assert refresh_jobs.submit_refresh('HOOD') != job_id
+
+
+def test_other_workers_see_progress_and_result(jobs, monkeypatch):
+    job_id = refresh_jobs.submit_refresh('TSLA')
+    wait_for(job_id, ('running',))
+    # A worker that did not start the job only has the shared files
+    with monkeypatch.context() as other_worker:
+        other_worker.setattr(refresh_jobs, '_jobs', {})
+        assert refresh_jobs.get_job(job_id)['progress'] == 50
+
+    jobs.set()
+    job = wait_for(job_id, ('finished',))
+    assert job['result']['status'] == 'success'
+    assert refresh_jobs.submit_refresh('TSLA') != job_id
+
+
+def test_deduplicated_across_processes(jobs, tmp_path):
+    job_id = refresh_jobs.submit_refresh('TSLA')
+    script = "from data.refresh_jobs import submit_refresh; print(submit_refresh('TSLA'))"
+    output = subprocess.run([sys.executable, '-c', script], cwd=APP_DIR, capture_output=True, text=True,
+                            env={**os.environ, 'FG_CACHE_DIR': str(tmp_path)}, check=True).stdout
+    assert output.strip().splitlines()[-1] == job_id
+
+
+def test_stale_job_is_reported_failed_and_replaced(jobs, monkeypatch):
+    job_id = refresh_jobs.submit_refresh('TSLA')
+    wait_for(job_id, ('running',))
+    with monkeypatch.context() as other_worker:
+        # Seen from another worker after the owner stopped reporting
+        other_worker.setattr(refresh_jobs, '_jobs', {})
+        other_worker.setattr(refresh_jobs, 'JOB_STALE_SECONDS', 0)
+        assert refresh_jobs.get_job(job_id)['status'] == 'failed'
+        assert refresh_jobs._claim('TSLA', 'replacement') == 'replacement'
+
+
+def test_unknown_job(jobs):
+    assert refresh_jobs.get_job('missing') is None
+
+
+def test_release_only_removes_own_claim(jobs):
+    assert refresh_jobs._claim('TSLA', 'first') == 'first'
+    refresh_jobs._release_claim('TSLA', 'someone-else')
+    with open(refresh_jobs._claim_path('TSLA')) as f:
+        assert f.read() == 'first'
+    refresh_jobs._release_claim('TSLA', 'first')
+    assert not os.path.exists(refresh_jobs._claim_path('TSLA'))
+    assert os.listdir(refresh_jobs._jobs_dir()) == []
+
+
+def test_contended_claim_shows_a_status_instead_of_failing(jobs, monkeypatch):
+    import app
+
+    def contended(ticker):
+        raise RuntimeError(f"Could not claim a refresh for {ticker}")
+
+    monkeypatch.setattr(app, 'submit_refresh', contended)
+    job_ref, poll_disabled, message, color, is_open = app.start_refresh(1, 'TSLA', 0)
+    assert message == "A refresh of TSLA is already running"
+    assert color == 'info' and is_open
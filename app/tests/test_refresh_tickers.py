@@ -0,0 +1,119 @@
+"""Batch refresh against the local fake upstream server and an offline SQLite database."""
+from datetime import date, timedelta
+import pandas as pd
+import pytest
+from sqlalchemy import inspect, text
+from benchmarks.fake_sources import STOCK_TABLE_DDL, FakeSources, create_offline_db
+from data import data_loader, data_updater, disk_cache
+from data.db import get_engine
+from data.rate_limit import RATE_LIMITERS
+
+
+@pytest.fixture
+def offline(tmp_path, monkeypatch):
+    """Fake upstreams, an empty SQLite database and unthrottled limiters for one test."""
+    monkeypatch.setattr(disk_cache, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(data_updater, 'BTC_HISTORY_START', date.today() - timedelta(days=10))
+    monkeypatch.setattr(data_updater, 'STOCK_HISTORY_START', date.today() - timedelta(days=10))
+    monkeypatch.setattr(data_updater, 'COINAPI_BASE_URL', data_updater.COINAPI_BASE_URL)
+    monkeypatch.setattr(data_loader, 'FG_API_URL', data_loader.FG_API_URL)
+    for bucket in RATE_LIMITERS.values():
+        monkeypatch.setattr(bucket, 'rate', 1000.0)
+        monkeypatch.setattr(bucket, 'capacity', 1000)
+    with FakeSources() as sources:
+        sources.install()
+        yield sources, create_offline_db(tmp_path / 'prices.db')
+
+
+def test_refreshes_every_ticker(offline):
+    sources, db_params = offline
+    report = data_updater.refresh_tickers(['BTC', 'TSLA', 'HOOD', 'TSLA'], max_workers=3,
+                                          fetch_fn=sources.fetch_stock, db_params=db_params)
+
+    assert report['succeeded'] == 3 and report['failed'] == 0
+    assert set(report['results']) == {'BTC', 'TSLA', 'HOOD'}
+    assert sources.requests['coinapi'] == 1 and sources.requests['yahoo'] == 2
+    with get_engine(db_params).connect() as conn:
+        stock_rows = conn.execute(text("SELECT ticker, COUNT(*) FROM stock_prices_daily GROUP BY ticker")).fetchall()
+        btc_rows = conn.execute(text("SELECT COUNT(*) FROM bitcoin_prices_daily")).scalar()
+    assert {ticker for ticker, count in stock_rows if count > 0} == {'TSLA', 'HOOD'}
+    assert btc_rows > 0
+
+
+def test_invalidates_cached_frames_of_refreshed_tickers(offline):
+    sources, db_params = offline
+    frame = pd.DataFrame({'date': [pd.Timestamp('2024-01-01')]})
+    data_loader._cache.set('stock', 'TSLA', frame)
+    data_loader._cache.set('stock', 'MSTR', frame)
+    data_loader._cache.set('rollup', ('weekly', 'TSLA'), frame)
+
+    data_updater.refresh_tickers(['TSLA'], fetch_fn=sources.fetch_stock, db_params=db_params)
+
+    assert data_loader._cache.get('stock', 'TSLA') is None
+    assert data_loader._cache.get('rollup', ('weekly', 'TSLA')) is None
+    assert data_loader._cache.get('stock', 'MSTR') is not None
+    data_loader.clear_cache()
+
+
+def test_failed_ticker_is_reported_without_stopping_the_batch(offline):
+    sources, db_params = offline
+
+    def fetch(ticker, start_date, end_date):
+        if ticker == 'BAD':
+            raise RuntimeError("upstream error")
+        return sources.fetch_stock(ticker, start_date, end_date)
+
+    report = data_updater.refresh_tickers(['BAD', 'TSLA'], fetch_fn=fetch, db_params=db_params)
+    assert report['results']['BAD']['status'] == 'error'
+    assert report['results']['TSLA']['status'] == 'success'
+
+
+def yahoo_day(sources, day, close):
+    df = sources.fetch_stock('TSLA', day, day)
+    return df.assign(Close=close)
+
+
+def stock_rows(db_params):
+    with get_engine(db_params).connect() as conn:
+        return conn.execute(text("SELECT date, close_price FROM stock_prices_daily WHERE ticker = 'TSLA'")).fetchall()
+
+
+def test_refreshing_the_same_day_twice_updates_it(offline):
+    sources, db_params = offline
+    day = pd.Timestamp('2024-03-01')
+    first = data_updater.update_stock_database('TSLA', yahoo_day(sources, day, 100.0), db_params)
+    second = data_updater.update_stock_database('TSLA', yahoo_day(sources, day, 101.0), db_params)
+    assert first == {'inserted': 1, 'updated': 0}
+    assert second == {'inserted': 0, 'updated': 1}
+    assert [close for _, close in stock_rows(db_params)] == [101.0]
+
+
+def unkeyed_db(path, duplicate_day=None):
+    """SQLite database whose stock_prices_daily table has no (ticker, date) key."""
+    db_params = {'url': f"sqlite:///{path}"}
+    with get_engine(db_params).begin() as conn:
+        conn.execute(text(STOCK_TABLE_DDL.replace(',\n        PRIMARY KEY (ticker, date)', '')))
+        if duplicate_day is not None:
+            for _ in range(2):
+                conn.execute(text("INSERT INTO stock_prices_daily (ticker, date) VALUES ('TSLA', :day)"),
+                             {'day': duplicate_day})
+    return db_params
+
+
+def test_missing_stock_key_is_created(offline, tmp_path):
+    sources, _ = offline
+    db_params = unkeyed_db(tmp_path / 'unkeyed.db')
+    day = pd.Timestamp('2024-03-01')
+    data_updater.update_stock_database('TSLA', yahoo_day(sources, day, 100.0), db_params)
+    data_updater.update_stock_database('TSLA', yahoo_day(sources, day, 101.0), db_params)
+    assert len(stock_rows(db_params)) == 1
+    with get_engine(db_params).connect() as conn:
+        indexes = inspect(conn).get_indexes('stock_prices_daily')
+    assert any(index['name'] == data_updater.STOCK_KEY_INDEX and index['unique'] for index in indexes)
+
+
+def test_duplicate_rows_blocking_the_stock_key_raise_a_clear_error(offline, tmp_path):
+    sources, _ = offline
+    db_params = unkeyed_db(tmp_path / 'duplicates.db', duplicate_day='2024-02-01')
+    with pytest.raises(RuntimeError, match='duplicate \\(ticker, date\\) rows'):
+        data_updater.update_stock_database('TSLA', yahoo_day(sources, pd.Timestamp('2024-03-01'), 100.0), db_params)
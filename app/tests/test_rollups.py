@@ -0,0 +1,83 @@
+"""Rollup tables in an offline SQLite database: keyed rows that match the app-side calculations."""
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from benchmarks.fake_sources import create_offline_db
+from data.data_processor import calculate_weekly_stats, merge_fear_greed
+from data.db import get_engine
+from data.rollups import refresh_rollups
+
+
+@pytest.fixture
+def db_params(tmp_path):
+    return create_offline_db(tmp_path / 'rollups.db')
+
+
+def insert_stock_rows(db_params, ticker, dates, seed=0):
+    rng = np.random.default_rng(seed)
+    price = 100 * np.cumprod(1 + rng.normal(0, 0.02, len(dates)))
+    rows = pd.DataFrame({
+        'ticker': ticker,
+        'date': pd.DatetimeIndex(dates).date,
+        'open_price': price,
+        'high_price': price * 1.02,
+        'low_price': price * 0.98,
+        'close_price': price * 1.01,
+        'volume': 1000,
+    })
+    with get_engine(db_params).begin() as conn:
+        rows.to_sql('stock_prices_daily', conn, if_exists='append', index=False)
+
+
+def fear_greed():
+    dates = pd.date_range('2023-12-01', '2024-06-30')
+    return pd.DataFrame({'date': dates, 'value': np.arange(len(dates)) % 100})
+
+
+def stored_weeks(db_params, ticker):
+    with get_engine(db_params).connect() as conn:
+        return pd.read_sql(text("SELECT * FROM weekly_stats WHERE ticker = :ticker ORDER BY week_start"),
+                           conn, params={'ticker': ticker}, parse_dates=['week_start', 'week_end'])
+
+
+def test_incremental_refresh_matches_full_weekly_stats(db_params):
+    days = pd.bdate_range('2024-01-01', '2024-03-29')
+    insert_stock_rows(db_params, 'TSLA', days[:40])
+    refresh_rollups('TSLA', fear_greed(), db_params)
+    insert_stock_rows(db_params, 'TSLA', days[40:], seed=1)
+    refresh_rollups('TSLA', fear_greed(), db_params, since=days[40])
+
+    with get_engine(db_params).connect() as conn:
+        daily = pd.read_sql(text("""
+            SELECT date, open_price AS market_open_price, close_price AS market_close_price,
+                   high_price AS daily_high, low_price AS daily_low
+            FROM stock_prices_daily WHERE ticker = 'TSLA' ORDER BY date
+        """), conn)
+    expected = calculate_weekly_stats(merge_fear_greed(daily, fear_greed()))
+    stored = stored_weeks(db_params, 'TSLA')
+    assert stored['week_start'].tolist() == expected['week_start'].tolist()
+    np.testing.assert_allclose(stored['weekly_change'], expected['weekly_change'])
+
+
+def test_tables_are_keyed_by_ticker_and_period(db_params):
+    insert_stock_rows(db_params, 'TSLA', pd.bdate_range('2024-01-01', '2024-02-29'))
+    refresh_rollups('TSLA', fear_greed(), db_params)
+    refresh_rollups('TSLA', fear_greed(), db_params)
+    assert not stored_weeks(db_params, 'TSLA')['week_start'].duplicated().any()
+
+    with get_engine(db_params).connect() as conn:
+        week_start = conn.execute(text("SELECT MIN(week_start) FROM weekly_stats")).scalar()
+        with pytest.raises(IntegrityError):
+            conn.execute(text("INSERT INTO weekly_stats (ticker, week_start) VALUES ('TSLA', :week_start)"),
+                         {'week_start': week_start})
+        month_start = conn.execute(text("SELECT MIN(month_start) FROM monthly_stats")).scalar()
+        with pytest.raises(IntegrityError):
+            conn.execute(text("INSERT INTO monthly_stats (ticker, month_start) VALUES ('TSLA', :month_start)"),
+                         {'month_start': month_start})
+
+
+def test_db_params_is_required():
+    with pytest.raises(TypeError):
+        refresh_rollups('TSLA', fear_greed())
@@ -0,0 +1,115 @@
+"""Parity of the vectorized transform_to_daily with the original per-day loop across DST transitions."""
+from datetime import time
+import numpy as np
+import pandas as pd
+import pytest
+from data.data_updater import transform_to_daily
+
+
+def legacy_transform_to_daily(df):
+    """The per-day masking implementation transform_to_daily replaced (frozen for parity)."""
+    df = df.copy()
+    df['time_open'] = pd.to_datetime(df['time_open'])
+    df['time_close'] = pd.to_datetime(df['time_close'])
+    if df['time_open'].dt.tz is not None:
+        df['time_open_et'] = df['time_open'].dt.tz_convert('US/Eastern')
+        df['time_close_et'] = df['time_close'].dt.tz_convert('US/Eastern')
+    else:
+        df['time_open_et'] = df['time_open'].dt.tz_localize('UTC').dt.tz_convert('US/Eastern')
+        df['time_close_et'] = df['time_close'].dt.tz_localize('UTC').dt.tz_convert('US/Eastern')
+
+    df['date'] = df['time_open_et'].dt.date
+    daily_data = []
+    for date_val, group in df.groupby('date'):
+        date_dt = pd.to_datetime(date_val)
+        market_open = pd.Timestamp.combine(date_dt.date(), time(9, 30)).tz_localize('US/Eastern')
+        market_close = pd.Timestamp.combine(date_dt.date(), time(16, 0)).tz_localize('US/Eastern')
+
+        open_price_row = group[(group['time_open_et'] <= market_open) & (group['time_close_et'] >= market_open)]
+        close_price_row = group[(group['time_open_et'] <= market_close) & (group['time_close_et'] >= market_close)]
+
+        market_open_price, market_close_price = None, None
+        market_open_timestamp, market_close_timestamp = None, None
+        if not open_price_row.empty:
+            market_open_price = open_price_row['rate_open'].iloc[0]
+            market_open_timestamp = market_open
+        else:
+            before_open = group[group['time_open_et'] <= market_open]
+            if not before_open.empty:
+                market_open_price = before_open.iloc[-1]['rate_close']
+                market_open_timestamp = before_open.iloc[-1]['time_close_et']
+        if not close_price_row.empty:
+            market_close_price = close_price_row['rate_close'].iloc[0]
+            market_close_timestamp = market_close
+        else:
+            after_close = group[group['time_close_et'] >= market_close]
+            if not after_close.empty:
+                market_close_price = after_close.iloc[0]['rate_open']
+                market_close_timestamp = after_close.iloc[0]['time_open_et']
+
+        daily_data.append({
+            'date': date_val,
+            'market_open_price': market_open_price,
+            'market_open_timestamp': market_open_timestamp,
+            'market_close_price': market_close_price,
+            'market_close_timestamp': market_close_timestamp,
+            'avg_price': group['rate_close'].mean(),
+            'daily_high': group['rate_high'].max(),
+            'daily_low': group['rate_low'].min(),
+        })
+
+    daily_df = pd.DataFrame(daily_data)
+    daily_df['date'] = pd.to_datetime(daily_df['date'])
+    daily_df['daily_price_change'] = ((daily_df['daily_high'] - daily_df['daily_low']) / daily_df['daily_low']).round(2)
+    daily_df['market_price_change'] = ((daily_df['market_close_price'] - daily_df['market_open_price']) / daily_df['market_open_price']).round(2)
+    return daily_df.dropna(subset=['market_open_price'])
+
+
+def make_bars(start, days, seed=0, drop=0.1):
+    """CoinAPI-style 30-minute UTC bars with a share of bars dropped at random."""
+    rng = np.random.default_rng(seed)
+    opens = pd.date_range(start, periods=days * 48, freq='30min', tz='UTC')
+    opens = opens[rng.random(len(opens)) >= drop]
+    n = len(opens)
+    rate_open = 100 + rng.random(n) * 10
+    rate_close = 100 + rng.random(n) * 10
+    return pd.DataFrame({
+        'time_period_start': opens.strftime('%Y-%m-%dT%H:%M:%S.0000000Z'),
+        'time_open': opens.strftime('%Y-%m-%dT%H:%M:%S.0000000Z'),
+        'time_close': (opens + pd.Timedelta(minutes=30)).strftime('%Y-%m-%dT%H:%M:%S.0000000Z'),
+        'rate_open': rate_open,
+        'rate_close': rate_close,
+        'rate_high': np.maximum(rate_open, rate_close) + 1,
+        'rate_low': np.minimum(rate_open, rate_close) - 1,
+    })
+
+
+def assert_same_days(actual, expected):
+    actual = actual.reset_index(drop=True)
+    expected = expected[actual.columns].reset_index(drop=True)
+    for col in ['market_open_timestamp', 'market_close_timestamp']:
+        actual[col] = pd.to_datetime(actual[col], utc=True)
+        expected[col] = pd.to_datetime(expected[col], utc=True)
+    actual['date'] = actual['date'].astype('datetime64[ns]')
+    expected['date'] = expected['date'].astype('datetime64[ns]')
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize('start', ['2024-03-05', '2024-10-28'], ids=['spring_forward', 'fall_back'])
+@pytest.mark.parametrize('drop', [0.0, 0.3])
+def test_matches_legacy_across_dst(start, drop):
+    bars = make_bars(start, days=10, drop=drop)
+    assert_same_days(transform_to_daily(bars), legacy_transform_to_daily(bars))
+
+
+def test_matches_legacy_when_market_hours_bars_are_missing():
+    bars = make_bars('2024-03-08', days=4, drop=0.0)
+    opened = pd.to_datetime(bars['time_open']).dt.tz_convert('US/Eastern')
+    minutes = opened.dt.hour * 60 + opened.dt.minute
+    # No bar spans 9:30 or 16:00, so both fallbacks are used
+    bars = bars[~minutes.isin([9 * 60, 9 * 60 + 30, 15 * 60 + 30, 16 * 60])]
+    assert_same_days(transform_to_daily(bars), legacy_transform_to_daily(bars))
+
+
+def test_empty_input():
+    assert transform_to_daily(pd.DataFrame()).empty
@@ -0,0 +1,110 @@
+"""Parity of the vectorized calculate_weekly_stats with the original per-group loop."""
+import numpy as np
+import pandas as pd
+import pytest
+from data.data_processor import calculate_weekly_stats
+from data.market_sentiment import MARKET_SENTIMENT
+
+
+def legacy_weekly_stats(df):
+    """The per-group iterrows implementation calculate_weekly_stats replaced (frozen for parity)."""
+    df = df.copy()
+    df['date'] = pd.to_datetime(df['date'])
+    df = df.sort_values('date')
+    df['weekday'] = df['date'].dt.weekday
+    df['iso_year'] = df['date'].dt.isocalendar().year
+    df['iso_week'] = df['date'].dt.isocalendar().week
+
+    weekly_data = []
+    for (year, week), group in df.groupby(['iso_year', 'iso_week']):
+        if len(group) < 2:
+            continue
+        group = group.sort_values('date')
+        first_day = group.iloc[0]
+        last_day = group.iloc[-1]
+
+        week_open = first_day['market_open_price']
+        week_close = last_day['market_close_price']
+        intraweek_high = group['daily_high'].max()
+        intraweek_low = group['daily_low'].min()
+        high_excursion = (intraweek_high - week_open) / week_open
+        low_excursion = (week_open - intraweek_low) / week_open
+
+        fg_values = {}
+        for _, row in group.iterrows():
+            day_name = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri'][row['weekday']] if row['weekday'] < 5 else None
+            if day_name and 'value' in row:
+                fg_values[day_name] = row['value']
+
+        weekly_data.append({
+            'year': int(year),
+            'week': int(week),
+            'month': first_day['date'].month,
+            'week_start': first_day['date'],
+            'week_end': last_day['date'],
+            'monday_open': week_open,
+            'friday_close': week_close,
+            'weekly_change': (week_close - week_open) / week_open,
+            'intraweek_high': intraweek_high,
+            'intraweek_low': intraweek_low,
+            'high_excursion': high_excursion,
+            'low_excursion': low_excursion,
+            'max_excursion': max(abs(high_excursion), abs(low_excursion)),
+            'fg_avg': group['value'].mean() if 'value' in group.columns else None,
+            'fg_mon': fg_values.get('Mon'),
+            'fg_tue': fg_values.get('Tue'),
+            'fg_wed': fg_values.get('Wed'),
+            'fg_thu': fg_values.get('Thu'),
+            'fg_fri': fg_values.get('Fri'),
+            'market_sentiment': MARKET_SENTIMENT.get(int(year), 'Unknown')
+        })
+    return pd.DataFrame(weekly_data)
+
+
+def make_daily(seed=0, years=3, with_fg=True):
+    """Shuffled daily rows with missing days, duplicated dates and NaN F&G values."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2019-12-23', periods=years * 365)
+    dates = dates[rng.random(len(dates)) > 0.15]
+    # Duplicate dates carry identical prices so row order within a day cannot matter
+    dates = dates.append(dates[rng.choice(len(dates), 10, replace=False)]).sort_values()
+    n = len(dates)
+    open_price = np.round(100 + rng.random(n) * 20, 4)
+    df = pd.DataFrame({
+        'date': dates,
+        'market_open_price': open_price,
+        'market_close_price': open_price * (1 + rng.normal(0, 0.02, n)),
+        'daily_high': open_price * 1.05,
+        'daily_low': open_price * 0.95,
+    })
+    df = df.groupby('date', as_index=False).transform('first').assign(date=dates)
+    if with_fg:
+        value = rng.integers(0, 100, n).astype(float)
+        value[rng.random(n) < 0.05] = np.nan
+        df['value'] = value
+        df['value'] = df.groupby('date')['value'].transform('first')
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def assert_same_weeks(actual, expected):
+    actual = actual.reset_index(drop=True)
+    expected = expected[actual.columns].reset_index(drop=True)
+    for col in ['fg_avg', 'fg_mon', 'fg_tue', 'fg_wed', 'fg_thu', 'fg_fri']:
+        actual[col] = pd.to_numeric(actual[col]).astype(float)
+        expected[col] = pd.to_numeric(expected[col]).astype(float)
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_matches_legacy_with_fear_greed(seed):
+    df = make_daily(seed)
+    assert_same_weeks(calculate_weekly_stats(df), legacy_weekly_stats(df))
+
+
+def test_matches_legacy_without_value_column():
+    df = make_daily(3, with_fg=False)
+    assert_same_weeks(calculate_weekly_stats(df), legacy_weekly_stats(df))
+
+
+def test_empty_frame():
+    assert calculate_weekly_stats(pd.DataFrame()).empty
@@ -0,0 +1,81 @@
+"""Incremental weekly stats must always equal a full calculate_weekly_stats recompute."""
+import numpy as np
+import pandas as pd
+import pytest
+from data import disk_cache, weekly_store
+from data.data_processor import calculate_weekly_stats
+from data.weekly_store import update_weekly_stats, weekly_stats_consistent
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(disk_cache, 'CACHE_DIR', str(tmp_path))
+
+
+def make_daily(start='2020-01-01', end='2020-12-31', seed=0):
+    """Sorted daily rows with random gaps, like the merged price/F&G frame."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2019-06-01', '2021-06-30')
+    price = 100 * np.cumprod(1 + rng.normal(0, 0.02, len(dates)))
+    df = pd.DataFrame({
+        'date': dates,
+        'market_open_price': price,
+        'market_close_price': price * (1 + rng.normal(0, 0.01, len(dates))),
+        'daily_high': price * 1.03,
+        'daily_low': price * 0.97,
+        'value': rng.integers(0, 100, len(dates)),
+    })
+    df = df[rng.random(len(df)) > 0.1]
+    return df[(df['date'] >= start) & (df['date'] <= end)].reset_index(drop=True)
+
+
+def assert_matches_full_recompute(weekly, daily):
+    assert weekly_stats_consistent(daily, weekly)
+    pd.testing.assert_frame_equal(weekly.reset_index(drop=True), calculate_weekly_stats(daily),
+                                  check_dtype=False)
+
+
+@pytest.mark.parametrize('start', [
+    '2020-01-01',  # Same start, new days appended
+    '2020-01-20',  # Trailing window moved forward by weeks
+    '2020-01-03',  # Moved forward within the first week
+    '2019-11-15',  # Backfilled history
+], ids=['appended', 'start_later', 'start_later_same_week', 'start_earlier'])
+def test_update_matches_full_recompute(start):
+    update_weekly_stats('TEST', make_daily('2020-01-01', '2020-12-15'))
+    daily = make_daily(start, '2020-12-31')
+    assert_matches_full_recompute(update_weekly_stats('TEST', daily), daily)
+
+
+def test_daily_trailing_window():
+    """Simulate a month of daily refreshes over a fixed-size trailing window."""
+    full = make_daily('2019-06-01', '2021-06-30')
+    for offset in range(30):
+        daily = full.iloc[offset:offset + 300].reset_index(drop=True)
+        weekly = update_weekly_stats('TEST', daily)
+    assert_matches_full_recompute(weekly, daily)
+
+
+def test_updated_table_is_persisted():
+    daily = make_daily()
+    weekly = update_weekly_stats('TEST', daily)
+    stored = disk_cache.read_cached('weekly_stats', 'TEST', date_col='week_start')
+    pd.testing.assert_frame_equal(stored, weekly, check_dtype=False)
+
+
+def test_start_advancing_one_day_stays_incremental(monkeypatch):
+    """A trailing window moving forward one day must not fall back to a full recompute."""
+    full = make_daily('2019-06-01', '2021-06-30')
+    update_weekly_stats('TEST', full.iloc[:300].reset_index(drop=True))
+
+    recomputed_rows = []
+
+    def counting_stats(df):
+        recomputed_rows.append(len(df))
+        return calculate_weekly_stats(df)
+
+    monkeypatch.setattr(weekly_store, 'calculate_weekly_stats', counting_stats)
+    daily = full.iloc[1:301].reset_index(drop=True)
+    weekly = update_weekly_stats('TEST', daily)
+    assert max(recomputed_rows) <= 14
+    assert_matches_full_recompute(weekly, daily)
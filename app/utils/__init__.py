@@ -1,4 +1,4 @@
-"""Utility modules for colors and formatting."""
+"""Utility modules for colors, formatting and rolling statistics."""
 from .colors import CHANGE_COLORS, BREACH_COLORS, get_change_color, get_breach_border
 from .formatters import format_price, format_percent, format_fg_range
-
+from .rolling import rolling_mean
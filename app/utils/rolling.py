@@ -0,0 +1,33 @@
+"""Trailing moving averages from cumulative sums (numpy only, so the analysis scripts can import it)."""
+import numpy as np
+
+def rolling_mean(values, window):
+    """Trailing mean over `window` rows from one cumulative sum.
+
+    NaN until the window fills and for every window containing a NaN value,
+    like pandas rolling(window).mean().
+    """
+    values = np.asarray(values, dtype=float)
+    csum, counts = cumulative_sums(values)
+    return window_means(csum, counts, window, np.arange(len(values)))
+
+def cumulative_sums(values, csum_start=0.0, count_start=0):
+    """Cumulative sum of the finite values and count of finite values, each with a leading start entry."""
+    finite = np.isfinite(values)
+    csum = np.cumsum(np.r_[csum_start, np.where(finite, values, 0.0)])
+    counts = np.cumsum(np.r_[count_start, finite.astype(np.int64)])
+    return csum, counts
+
+def window_means(csum, counts, window, rows):
+    """Trailing means ending at positions `rows`, given csum[i] / counts[i] over the first i values.
+
+    A window is only filled when all of its values are finite, so a NaN
+    value blanks the windows covering it rather than every later one.
+    """
+    out = np.full(len(rows), np.nan)
+    ends = rows + 1
+    full = ends >= window
+    full[full] = counts[ends[full]] - counts[ends[full] - window] == window
+    ends = ends[full]
+    out[full] = (csum[ends] - csum[ends - window]) / window
+    return out
@@ -0,0 +1,112 @@
+import time
+import numpy as np
+import pandas as pd
+from strategy_rules import load_strategies
+
+
+# ============ Strategies ============
+# Declared as rules in strategies.json and compiled to vectorized buy-amount
+# functions: STRATEGIES[name](df, base_amount) -> amount per day (0 = no trade).
+
+STRATEGIES = load_strategies()
+
+
+# ============ Engine ============
+
+def backtest(df, buy_amounts, price_col='daily_avg_price'):
+    """Simulate buy-and-hold trades from a per-day buy amount array.
+
+    Holdings, invested capital and the equity curve are cumulative sums, so the
+    whole history is evaluated without a Python loop. Returns totals, the
+    annualized return and the daily curve.
+    """
+    price = df[price_col].to_numpy(dtype=float)
+    amounts = np.asarray(buy_amounts, dtype=float)
+    trade = amounts > 0
+    quantity = np.where(trade, amounts / price, 0.0)
+
+    holdings = np.cumsum(quantity)
+    invested = np.cumsum(amounts)
+    equity = holdings * price
+
+    held = holdings[-1] if len(holdings) else 0.0
+    total_investment = invested[-1] if len(invested) else 0.0
+    final_value = held * price[-1] if len(price) else 0.0
+    annualized_return = ((final_value / total_investment) ** (365 / len(df))) - 1 if total_investment > 0 else np.nan
+
+    return {
+        'held': held,
+        'final_value': final_value,
+        'total_investment': total_investment,
+        'n_trades': int(trade.sum()),
+        'annualized_return': annualized_return,
+        'trade_mask': trade,
+        'quantity': quantity,
+        'curve': pd.DataFrame({
+            'date': df['date'].to_numpy(),
+            'holdings': holdings,
+            'invested': invested,
+            'equity': equity,
+        }),
+    }
+
+def trades_frame(df, result, amounts, symbol, price_col='daily_avg_price'):
+    """Trade records (one row per buy) in the layout used by the plotting helpers."""
+    trade = result['trade_mask']
+    return pd.DataFrame({
+        'date': df['date'].to_numpy()[trade],
+        'action': 'Buy',
+        'amount_invested': np.asarray(amounts, dtype=float)[trade],
+        'daily_avg_price': df[price_col].to_numpy()[trade],
+        'symbol': symbol,
+        'quantity': result['quantity'][trade],
+        'sentiment': df['value_classification'].to_numpy()[trade],
+    })
+
+def format_trades(trades_df, trade_rows, log_fields=None):
+    """Human-readable trade log lines; trade_rows are the source frame rows of the trades.
+
+    log_fields ({label: column}) adds "label: value" fields before the sentiment,
+    as declared by a strategy's "log" entry.
+    """
+    log_fields = log_fields or {}
+    extras = trade_rows[list(log_fields.values())].to_numpy(dtype=float) if log_fields else np.empty((len(trades_df), 0))
+    rows = zip(trades_df['date'], trades_df['amount_invested'], trades_df['daily_avg_price'],
+               trade_rows['current_max_price'], trade_rows['price_ratio'],
+               trades_df['quantity'], trade_rows['value'], trades_df['sentiment'], trades_df['symbol'], extras)
+    return [
+        f"Buy: {date}, usd_balance: ${amount:.2f}, Price: ${price:.2f}, Current Max Price: {max_price:.2f}, "
+        f"Price Ratio: {ratio:.2f}, {symbol}: {qty:.6f}, "
+        + ''.join(f"{label}: {value:.2f}, " for label, value in zip(log_fields, extra))
+        + f"Sentiment: {index}, {sentiment}"
+        for date, amount, price, max_price, ratio, qty, index, sentiment, symbol, extra in rows
+    ]
+
+def run_strategy(symbol, df, investment_amount, strategy):
+    """Backtest one named strategy; returns (trades, held, final_value, total_investment, trades_df)."""
+    df = df.sort_values('date')
+    amounts = STRATEGIES[strategy](df, investment_amount)
+    result = backtest(df, amounts)
+    trades_df = trades_frame(df, result, amounts, symbol)
+    trades = format_trades(trades_df, df[result['trade_mask']], STRATEGIES[strategy].log_fields)
+    return trades, result['held'], result['final_value'], result['total_investment'], trades_df
+
+def run_all(df, investment_amount, strategies=None):
+    """Backtest many strategies on one sorted frame; returns a summary table (one row per strategy)."""
+    df = df.sort_values('date')
+    rows = []
+    masks = {}  # Condition masks shared across strategies on this frame
+    for name in strategies or STRATEGIES:
+        started = time.perf_counter()
+        result = backtest(df, STRATEGIES[name](df, investment_amount, masks))
+        rows.append({
+            'strategy': name,
+            'n_trades': result['n_trades'],
+            'held': result['held'],
+            'total_investment': result['total_investment'],
+            'final_value': result['final_value'],
+            'profit': result['final_value'] - result['total_investment'],
+            'annualized_return': result['annualized_return'],
+            'elapsed_ms': (time.perf_counter() - started) * 1000,
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import re
+import numpy as np
+import pandas as pd
+
+# A strategy is data:
+#   {"name": "...", "rules": [{"when": {...}, "buy": 500 | "base", "mode": "set" | "add"}, ...]}
+# Rules apply in order. "set" replaces the day's amount where the condition holds,
+# "add" adds to it. Conditions AND their keys together; {"any": [cond, ...]} ORs
+# sub-conditions. Keys are columns (value, value_classification, price_ratio,
+# daily_change, MA<n>_ratio) or "period" (every_day, week_start, month_start,
+# year_start). Values are "<op> number" strings, a label, or a list of labels.
+# An empty condition matches every day. "base" is the investment amount passed in.
+# An optional "log": {"label": "column", ...} adds those columns to the strategy's
+# trade log lines, e.g. {"MA120": "MA_120"}.
+
+STRATEGIES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'strategies.json')
+
+COLUMN_PATTERN = re.compile(r'^(value|value_classification|price_ratio|daily_change|MA\d+_ratio)$')
+LOG_COLUMN_PATTERN = re.compile(r'^(MA_\d+|MA\d+_ratio|price_ratio|current_max_price|daily_change|value)$')
+COMPARISON_PATTERN = re.compile(r'^\s*(<=|>=|==|!=|<|>)\s*(-?\d+(?:\.\d+)?)\s*$')
+PERIODS = ('every_day', 'week_start', 'month_start', 'year_start')
+
+_OPS = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '==': np.equal,
+    '!=': np.not_equal,
+}
+
+_compiled = {}
+
+
+def strategy_hash(spec):
+    """Stable content hash of a strategy spec (key for the compiled-strategy cache)."""
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:16]
+
+def _period_mask(df, period):
+    """True on the first row of each calendar period in a date-sorted frame."""
+    if period == 'every_day':
+        return np.ones(len(df), dtype=bool)
+    dates = pd.to_datetime(df['date'])
+    if period == 'week_start':
+        iso = dates.dt.isocalendar()
+        key = (iso['year'] * 100 + iso['week']).to_numpy()
+    elif period == 'month_start':
+        key = (dates.dt.year * 12 + dates.dt.month).to_numpy()
+    else:
+        key = dates.dt.year.to_numpy()
+    mask = np.ones(len(key), dtype=bool)
+    mask[1:] = key[1:] != key[:-1]
+    return mask
+
+def _compile_term(key, expected):
+    """Compile one `key: expected` condition to a function(df) -> boolean array."""
+    if key == 'period':
+        if expected not in PERIODS:
+            raise ValueError(f"Unknown period {expected!r}; expected one of {PERIODS}")
+        return lambda df: _period_mask(df, expected)
+    if not COLUMN_PATTERN.match(key):
+        raise ValueError(f"Unknown condition column {key!r}")
+    if isinstance(expected, list):
+        return lambda df: df[key].isin(expected).to_numpy()
+    match = COMPARISON_PATTERN.match(expected) if isinstance(expected, str) else None
+    if match:
+        op, number = _OPS[match.group(1)], float(match.group(2))
+        return lambda df: op(df[key].to_numpy(dtype=float), number)
+    return lambda df: (df[key] == expected).to_numpy()
+
+def _compile_condition(condition):
+    """Compile a condition dict (AND of its terms, OR inside "any") to function(df, masks) -> bool array.
+
+    masks memoizes term results per evaluation, so conditions shared between
+    rules or strategies are computed once per frame.
+    """
+    terms = []
+    for key, expected in condition.items():
+        if key == 'any':
+            branches = [_compile_condition(branch) for branch in expected]
+            terms.append((None, branches))
+        else:
+            term_key = json.dumps([key, expected], sort_keys=True)
+            terms.append((term_key, _compile_term(key, expected)))
+
+    def evaluate(df, masks):
+        mask = np.ones(len(df), dtype=bool)
+        for term_key, term in terms:
+            if term_key is None:
+                mask &= np.logical_or.reduce([branch(df, masks) for branch in term])
+                continue
+            if term_key not in masks:
+                masks[term_key] = term(df)
+            mask &= masks[term_key]
+        return mask
+    return evaluate
+
+def compile_strategy(spec):
+    """Parse and validate a strategy spec once; return a function(df, base_amount, masks=None) -> amounts.
+
+    Compiled strategies are cached by spec hash.
+    """
+    key = strategy_hash(spec)
+    if key in _compiled:
+        return _compiled[key]
+
+    rules = []
+    for rule in spec['rules']:
+        mode = rule.get('mode', 'set')
+        if mode not in ('set', 'add'):
+            raise ValueError(f"Unknown rule mode {mode!r} in {spec.get('name')!r}")
+        buy = rule['buy']
+        if buy != 'base' and not isinstance(buy, (int, float)):
+            raise ValueError(f"Rule amount must be a number or 'base', got {buy!r}")
+        rules.append((_compile_condition(rule.get('when', {})), buy, mode))
+
+    def evaluate(df, base_amount, masks=None):
+        masks = {} if masks is None else masks
+        amounts = np.zeros(len(df))
+        for condition, buy, mode in rules:
+            mask = condition(df, masks)
+            value = base_amount if buy == 'base' else buy
+            if mode == 'set':
+                amounts = np.where(mask, value, amounts)
+            else:
+                amounts = np.where(mask, amounts + value, amounts)
+        return amounts
+
+    log_fields = spec.get('log', {})
+    for label, column in log_fields.items():
+        if not LOG_COLUMN_PATTERN.match(column):
+            raise ValueError(f"Unknown log column {column!r} for {label!r} in {spec.get('name')!r}")
+
+    evaluate.name = spec.get('name')
+    evaluate.log_fields = log_fields
+    evaluate.hash = key
+    _compiled[key] = evaluate
+    return evaluate
+
+def load_strategies(path=STRATEGIES_PATH):
+    """Load and compile a JSON list of strategy specs; returns {name: compiled strategy}."""
+    with open(path) as f:
+        specs = json.load(f)
+    return {spec['name']: compile_strategy(spec) for spec in specs}
+
+def evaluate_many(df, strategies, base_amount):
+    """Buy amount arrays for many compiled strategies, sharing condition masks across them."""
+    masks = {}
+    return {name: strategy(df, base_amount, masks) for name, strategy in strategies.items()}
@@ -0,0 +1,170 @@
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+from utils.rolling import rolling_mean  # numpy only, keeps this script independent of the app's data package
+
+
+# On schedule days buy base_amount, plus extra_amount when it is also a "deep fear"
+# day (value <= fear_threshold and MA{ma_window}_ratio >= ma_ratio). With the daily
+# schedule and base_amount 0 only deep-fear days trade.
+SCHEDULES = ['extreme_fear', 'monthly', 'daily']
+
+DEFAULT_GRID = {
+    'schedule': SCHEDULES,
+    'fear_threshold': list(range(10, 31, 2)),
+    'ma_window': [30, 60, 90, 120, 150, 180],
+    'ma_ratio': [0.0, 0.2, 0.4, 0.6, 0.8],
+    'base_amount': [0, 50, 500, 1000],
+    'extra_amount': [500, 1000, 2000],
+}
+
+PARAM_COLUMNS = list(DEFAULT_GRID)
+METRIC_COLUMNS = ['annualized_return', 'total_return', 'max_drawdown', 'n_trades', 'total_investment', 'final_value']
+
+
+# ============ Features ============
+
+def build_features(df, ma_windows, price_col='daily_avg_price'):
+    """Per-day arrays the sweep needs, keyed by name (all float64, same length).
+
+    Uses the frame's MA{w}_ratio columns when present (as the named strategies
+    do) and derives MA/price - 1 from a rolling mean otherwise.
+    """
+    df = df.sort_values('date')
+    price = df[price_col].to_numpy(dtype=float)
+    dates = pd.to_datetime(df['date'])
+    month_key = (dates.dt.year * 12 + dates.dt.month).to_numpy()
+    month_start = np.ones(len(df), dtype=bool)
+    month_start[1:] = month_key[1:] != month_key[:-1]
+
+    features = {
+        'price': price,
+        'value': df['value'].to_numpy(dtype=float),
+        'extreme_fear': (df['value_classification'] == 'Extreme Fear').to_numpy(dtype=float),
+        'monthly': month_start.astype(float),
+        'daily': np.ones(len(df)),
+    }
+    for window in ma_windows:
+        col = f'MA{window}_ratio'
+        if col in df.columns:
+            features[col] = df[col].to_numpy(dtype=float)
+        else:
+            features[col] = rolling_mean(price, window) / price - 1
+    return features
+
+
+# ============ Shared memory workers ============
+
+_worker = {}
+
+def _attach(shm_name, names, n_days):
+    """Pool initializer: map the shared feature block as read-only numpy views."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    block = np.ndarray((len(names), n_days), dtype=np.float64, buffer=shm.buf)
+    block.flags.writeable = False
+    _worker['shm'] = shm
+    _worker['features'] = dict(zip(names, block))
+
+def evaluate_params(features, params):
+    """Evaluate a chunk of parameter rows at once as a (combos x days) cumulative-sum backtest.
+
+    params columns follow PARAM_COLUMNS with schedule as an index into SCHEDULES.
+    Returns a (combos x len(METRIC_COLUMNS)) array.
+    """
+    price = features['price']
+    n_days = len(price)
+    schedule = np.stack([features[name] for name in SCHEDULES])[params[:, 0].astype(int)]
+    ma_ratio = np.stack([features[f'MA{int(w)}_ratio'] for w in params[:, 2]])
+
+    deep = (features['value'][None, :] <= params[:, [1]]) & (ma_ratio >= params[:, [3]])
+    amounts = schedule * (params[:, [4]] + params[:, [5]] * deep)
+    trade = amounts > 0
+
+    holdings = np.cumsum(np.where(trade, amounts / price, 0.0), axis=1)
+    invested = np.cumsum(amounts, axis=1)
+    equity = holdings * price
+
+    total_investment = invested[:, -1]
+    final_value = equity[:, -1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        multiple = final_value / total_investment
+        annualized_return = np.where(total_investment > 0, multiple ** (365 / n_days) - 1, np.nan)
+        # Drawdown of the portfolio's value per invested dollar
+        ratio = np.where(invested > 0, equity / invested, np.nan)
+        peak = np.fmax.accumulate(ratio, axis=1)
+        max_drawdown = np.nan_to_num(1 - ratio / peak, nan=0.0).max(axis=1)
+
+    return np.column_stack([
+        annualized_return,
+        np.where(total_investment > 0, multiple - 1, np.nan),
+        max_drawdown,
+        trade.sum(axis=1),
+        total_investment,
+        final_value,
+    ])
+
+def _evaluate_chunk(params):
+    return evaluate_params(_worker['features'], params)
+
+
+# ============ Sweep ============
+
+def expand_grid(grid):
+    """Cartesian product of a parameter grid as a numeric (combos x params) array."""
+    grid = {**DEFAULT_GRID, **(grid or {})}
+    axes = [[SCHEDULES.index(s) for s in grid[name]] if name == 'schedule' else grid[name]
+            for name in PARAM_COLUMNS]
+    return np.array(list(itertools.product(*axes)), dtype=float)
+
+def sweep(df, grid=None, max_workers=None, chunk_size=256, price_col='daily_avg_price'):
+    """Evaluate every grid combination across a process pool; return results ranked by annualized return.
+
+    The per-day feature arrays are written once to shared memory and mapped by
+    each worker, so tasks only carry their parameter rows.
+    """
+    params = expand_grid(grid)
+    ma_windows = sorted({int(w) for w in params[:, 2]})
+    features = build_features(df, ma_windows, price_col)
+    names = list(features)
+    n_days = len(features['price'])
+
+    shm = shared_memory.SharedMemory(create=True, size=max(len(names) * n_days * 8, 1))
+    try:
+        block = np.ndarray((len(names), n_days), dtype=np.float64, buffer=shm.buf)
+        for row, name in enumerate(names):
+            block[row] = features[name]
+
+        chunks = [params[i:i + chunk_size] for i in range(0, len(params), chunk_size)]
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(),
+                                 initializer=_attach, initargs=(shm.name, names, n_days)) as pool:
+            metrics = np.vstack(list(pool.map(_evaluate_chunk, chunks)))
+        del block
+    finally:
+        shm.close()
+        shm.unlink()
+
+    results = pd.DataFrame(params, columns=PARAM_COLUMNS)
+    results['schedule'] = np.asarray(SCHEDULES)[params[:, 0].astype(int)]
+    results[METRIC_COLUMNS] = metrics
+    results['n_trades'] = results['n_trades'].astype(int)
+    results = results.sort_values(['annualized_return', 'max_drawdown'], ascending=[False, True], na_position='last')
+    results.insert(0, 'rank', np.arange(1, len(results) + 1))
+    return results.reset_index(drop=True)
+
+
+if __name__ == '__main__':
+    data = pd.read_csv(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'high_index_df.csv'))
+    data['date'] = pd.to_datetime(data['date'], dayfirst=True)
+
+    started = time.perf_counter()
+    ranked = sweep(data)
+    elapsed = time.perf_counter() - started
+    print(f"Evaluated {len(ranked)} parameter combinations in {elapsed:.2f}s")
+    print(ranked.head(20).to_string(index=False))
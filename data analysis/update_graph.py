@@ -6,6 +6,10 @@ import os
 from plotly.subplots import make_subplots
 from datetime import datetime, timedelta,date
 import numpy as np
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+from utils.rolling import rolling_mean  # numpy only, keeps this script independent of the app's data package
 
 
 def get_fear_greed_data(limit=30):
@@ -45,7 +49,7 @@ def get_historical_price_data(symbol, start_date, end_date, api_key):
     df = pd.DataFrame(data)
     df['date'] = pd.to_datetime(df['time_period_start']).dt.date
     df = df.rename(columns={'rate_open': 'daily_min_price', 'rate_high': 'daily_max_price', 'rate_close': 'daily_avg_price'})
-    df['MA_125'] = df['daily_avg_price'].rolling(window=125).mean()
+    df['MA_125'] = rolling_mean(df['daily_avg_price'], 125)
     return df[['date', 'daily_min_price', 'daily_max_price', 'daily_avg_price','MA_125']]
 
 
@@ -68,7 +72,7 @@ def plot_data_with_fear_greed_alerts(merged_df, symbol):
     merged_df = merged_df.sort_values('date')
 
     # Calculate the 125-day moving average
-    merged_df['MA_125'] = merged_df['daily_avg_price'].rolling(window=125).mean()
+    merged_df['MA_125'] = rolling_mean(merged_df['daily_avg_price'], 125)
 
     # Create figure with secondary y-axis
     fig = make_subplots(specs=[[{"secondary_y": True}]])
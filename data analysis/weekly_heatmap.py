@@ -11,9 +11,14 @@ import pandas as pd
 from sqlalchemy import create_engine, types, text
 import numpy as np
 import seaborn as sns
+import sys
 import load_data_from_postgres_db as ld
 import yfinance as yf
 
+# Reuse the dashboard's weekly stats so both pair weeks the same way
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+from data.data_processor import calculate_weekly_stats
+
 def get_fear_greed_data(limit=30):
     url = f"https://api.alternative.me/fng/?limit={limit}&format=json&date_format=us"
     response = requests.get(url)
@@ -189,27 +194,41 @@ def transform_price_data_daily(df):
     daily_df = daily_df.dropna(subset=['market_open_price'])
 
     # generate the monday to friday change
+    return add_monday_to_friday_change(daily_df)
 
-    # Extract the weekday (0=Monday, 4=Friday)
-    daily_df['weekday'] = daily_df['date'].dt.weekday
-
-    # Initialize a new column for the price change between Monday and Friday
-    daily_df['monday_price'] = None
-    daily_df['friday_price'] = None
-    daily_df['monday_to_friday_change'] = None
-
-# Iterate through the DataFrame to calculate the price change
-    for i in range(len(daily_df) - 4):
-        if daily_df.iloc[i]['weekday'] == 0:  # If it's a Monday
-            monday_price = daily_df.iloc[i]['market_open_price']
-            friday_price = daily_df.iloc[i+4]['market_close_price']
-            price_change = (friday_price - monday_price) / monday_price
-            daily_df.at[i, 'monday_price'] = monday_price
-            daily_df.at[i, 'friday_price'] = friday_price
-            daily_df.at[i+4, 'monday_to_friday_change'] = price_change
 
-    
-    return daily_df
+def add_monday_to_friday_change(df):
+    """
+    Add the Monday open to Friday close change of each ISO week.
+
+    Weekend rows are ignored and each week is paired by calculate_weekly_stats,
+    so a holiday pairs the week's first trading day open with its last trading
+    day close instead of shifting into the next week. The values are written on
+    the week's first trading day row; other rows get NaN.
+
+    Parameters:
+    df (pd.DataFrame): Daily rows with date, market_open_price, market_close_price, daily_high and daily_low
+
+    Returns:
+    pd.DataFrame: Date-sorted copy with weekday, monday_price, friday_price and monday_to_friday_change columns
+    """
+    result = df.copy()
+    result['date'] = pd.to_datetime(result['date'])
+    result = result.sort_values(by='date', ascending=True)
+
+    # Extract the weekday (0=Monday, 4=Friday)
+    result['weekday'] = result['date'].dt.weekday
+
+    weekly = calculate_weekly_stats(result[result['weekday'] < 5])
+    if weekly.empty:
+        weekly = pd.DataFrame(columns=['week_start', 'monday_open', 'friday_close', 'weekly_change'])
+    weeks = pd.DataFrame({
+        'date': pd.to_datetime(weekly['week_start']).astype(result['date'].dtype),
+        'monday_price': weekly['monday_open'].astype(float),
+        'friday_price': weekly['friday_close'].astype(float),
+        'monday_to_friday_change': weekly['weekly_change'].astype(float),
+    })
+    return result.merge(weeks, on='date', how='left')
 
 
 def merge_data(fear_greed_df, coin_df):
@@ -365,35 +384,7 @@ def add_market_sentiment(df):
 def create_btc_weekly_heatmap(df, bins,bucket_order, column_names=['monday_to_friday_change']):
     
     #Calculate the price change from Monday open to Friday close for each week.
-    result_df = df.copy()
-
-    # Ensure the date column is of datetime type
-    result_df['date'] = pd.to_datetime(result_df['date'])
-
-    # Sort the DataFrame in ascending order based on the date column
-    result_df = result_df.sort_values(by='date', ascending=True)
-    
-    # Extract the weekday (0=Monday, 4=Friday)
-    result_df['weekday'] = result_df['date'].dt.weekday
-    
-    # Initialize new columns for the price change between Monday and Friday
-    result_df['monday_price'] = None
-    result_df['friday_price'] = None
-    result_df['monday_to_friday_change'] = None
-    
-    # Iterate through the DataFrame to calculate the price change
-    for i in range(len(result_df) - 4):
-        if result_df.iloc[i]['weekday'] == 0:  # If it's a Monday
-            # print(result_df.iloc[i])
-            monday_price = result_df.iloc[i]['market_open_price']
-            friday_price = result_df.iloc[i+4]['market_close_price']
-            price_change = (friday_price - monday_price) / monday_price
-            
-            # Use .loc instead of direct assignment to avoid SettingWithCopyWarning
-            result_df.loc[result_df.index[i], 'monday_price'] = monday_price
-            result_df.loc[result_df.index[i], 'friday_price'] = friday_price
-            result_df.loc[result_df.index[i], 'monday_to_friday_change'] = price_change
-    
+    result_df = add_monday_to_friday_change(df)
     result_df = result_df.dropna(subset=['monday_to_friday_change'])
     print(result_df.head(5))
 